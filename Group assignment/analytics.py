@@ -0,0 +1,176 @@
+import argparse
+import gzip
+import json
+import sys
+from collections import Counter
+
+from OopGroup2023 import LEVEL_NAMES
+
+# Finished sessions as newline-delimited JSON: each game's log events followed by one session
+# record with its outcome and PlayerStats. Files are appended to as games end and read back
+# one line at a time, so the aggregator's memory does not grow with the number of sessions.
+#
+#   {"type":"event","session":7,"time":1700000000.1,"level":"INFO","code":"door_choice","args":[2]}
+#   {"type":"session","session":7,"scenario":"train_murder","outcome":"won","start":...,"end":...,
+#    "clues_found":3,"clues":[0,4,1],"decisions":["Arrested Mr. Ireland"],"wrong_passwords":[2]}
+
+TIME_RESOLUTION = 10  # Time-to-arrest is counted in tenths of a second
+
+
+def session_records(game, session, events=True):
+    # The records for one finished game, events first. The session record stands on its own,
+    # so events can be left out to keep the files small.
+    if events:
+        for when, level, code, args in game.get_log_records():
+            yield {"type": "event", "session": session, "time": when, "level": LEVEL_NAMES.get(level, level),
+                   "code": code, "args": list(args)}
+    stats = game.player_stats
+    clue_index = game.scenario.clue_index
+    yield {"type": "session", "session": session, "scenario": game.scenario.id, "outcome": game.outcome,
+           "start": stats.start_time, "end": stats.end_time, "clues_found": stats.clues_found,
+           "clues": [clue_index.get(clue, -1) for clue in game.clues], "decisions": stats.decisions_made,
+           "wrong_passwords": stats.wrong_passwords}
+
+
+class AnalyticsWriter:
+    # Appends finished games to a stream, one write per game
+    __slots__ = ("stream", "events", "next_session", "sessions")
+
+    def __init__(self, stream, events=True, next_session=0):
+        self.stream = stream
+        self.events = events
+        self.next_session = next_session  # Used for games without a journal session number
+        self.sessions = 0
+
+    def write_game(self, game):
+        session = game.journal_session
+        if session is None:
+            session = self.next_session
+            self.next_session += 1
+        self.stream.write("".join(json.dumps(record, separators=(",", ":")) + "\n"
+                                  for record in session_records(game, session, self.events)))
+        self.sessions += 1
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self):
+        self.stream.close()
+
+
+def open_records(path):
+    # Text stream of a records file, gzip-compressed when the name ends in .gz, "-" for stdin
+    if path == "-":
+        return sys.stdin
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def read_records(paths):
+    # Every record of every file, parsed lazily
+    for path in paths:
+        stream = open_records(path)
+        try:
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+class Aggregator:
+    # Running totals over any number of sessions. Everything kept is bounded by the scenario
+    # (clues, carriages, lineup) or by the time resolution, never by the session count.
+    __slots__ = ("sessions", "outcomes", "arrest_times", "clue_sessions", "clue_positions", "first_clues",
+                 "failed_passwords", "decisions", "events")
+
+    def __init__(self):
+        self.sessions = 0
+        self.outcomes = Counter()
+        self.arrest_times = Counter()  # Tenths of a second from start to arrest -> sessions
+        self.clue_sessions = Counter()  # (scenario, clue id) -> sessions that found it
+        self.clue_positions = Counter()  # (scenario, clue id) -> sum of its positions in the discovery order
+        self.first_clues = Counter()  # (scenario, clue id) -> sessions that found it first
+        self.failed_passwords = Counter()  # (scenario, carriage number) -> wrong passwords given
+        self.decisions = Counter()
+        self.events = Counter()  # Event code -> records
+
+    def add(self, record):
+        if record["type"] == "event":
+            self.events[record["code"]] += 1
+            return
+        self.sessions += 1
+        outcome = record["outcome"]
+        self.outcomes[outcome] += 1
+        if outcome in ("won", "lost") and record["end"] is not None:
+            self.arrest_times[round((record["end"] - record["start"]) * TIME_RESOLUTION)] += 1
+        scenario = record["scenario"]
+        for position, clue_id in enumerate(record["clues"]):
+            key = (scenario, clue_id)
+            self.clue_sessions[key] += 1
+            self.clue_positions[key] += position
+        if record["clues"]:
+            self.first_clues[(scenario, record["clues"][0])] += 1
+        self.decisions.update(record["decisions"])
+        for carriage in record["wrong_passwords"]:
+            self.failed_passwords[(scenario, carriage)] += 1
+
+    def consume(self, records):
+        for record in records:
+            self.add(record)
+        return self
+
+    def merge(self, other):
+        self.sessions += other.sessions
+        for name in ("outcomes", "arrest_times", "clue_sessions", "clue_positions", "first_clues",
+                     "failed_passwords", "decisions", "events"):
+            getattr(self, name).update(getattr(other, name))
+
+    def win_rate(self):
+        return self.outcomes["won"] / self.sessions if self.sessions else 0.0
+
+    def arrest_time_quantile(self, fraction):
+        # Seconds, to the nearest tenth. None when no session ended in an arrest.
+        total = sum(self.arrest_times.values())
+        if not total:
+            return None
+        rank = fraction * total
+        seen = 0
+        for tenths in sorted(self.arrest_times):
+            seen += self.arrest_times[tenths]
+            if seen >= rank:
+                return tenths / TIME_RESOLUTION
+        return None
+
+    def discovery_order(self):
+        # (scenario, clue id, sessions that found it, average position) in the order clues tend to be found
+        order = [(scenario, clue_id, count, self.clue_positions[(scenario, clue_id)] / count)
+                 for (scenario, clue_id), count in self.clue_sessions.items()]
+        order.sort(key=lambda entry: (entry[0], entry[3]))
+        return order
+
+    def summary(self):
+        return {
+            "sessions": self.sessions,
+            "win_rate": self.win_rate(),
+            "outcomes": dict(self.outcomes.most_common()),
+            "median_time_to_arrest": self.arrest_time_quantile(0.5),
+            "p90_time_to_arrest": self.arrest_time_quantile(0.9),
+            "discovery_order": [{"scenario": scenario, "clue": clue_id, "found_by": count,
+                                 "average_position": round(position, 3)}
+                                for scenario, clue_id, count, position in self.discovery_order()],
+            "first_clues": [{"scenario": scenario, "clue": clue_id, "sessions": count}
+                            for (scenario, clue_id), count in self.first_clues.most_common()],
+            "most_failed_passwords": [{"scenario": scenario, "carriage": carriage, "failures": count}
+                                      for (scenario, carriage), count in self.failed_passwords.most_common()],
+            "decisions": dict(self.decisions.most_common()),
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate session analytics files (NDJSON, optionally .gz).")
+    parser.add_argument("paths", nargs="+", help="records files, - for stdin")
+    args = parser.parse_args()
+    print(json.dumps(Aggregator().consume(read_records(args.paths)).summary(), indent=2))
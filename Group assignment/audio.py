@@ -0,0 +1,224 @@
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+# pygame is only imported by PygameAudioBackend, so headless processes never load SDL
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Short jingles are decoded once and kept in memory, long looping tracks are streamed
+EFFECT_FILES = ["intro.mp3", "Trumpets.mp3", "womp.mp3", "victory.mp3", "wrong.mp3"]
+
+
+def find_asset(file_name, directory=ASSET_DIR):
+    # Case-insensitive lookup so "trumpets.mp3" and "Victory.mp3" still find their files
+    path = os.path.join(directory, file_name)
+    if os.path.exists(path):
+        return path
+    wanted = file_name.lower()
+    try:
+        for entry in os.listdir(directory):
+            if entry.lower() == wanted:
+                return os.path.join(directory, entry)
+    except OSError:
+        pass
+    return None
+
+
+class AudioCache:
+    def __init__(self, pygame, files=None, max_bytes=64 * 1024 * 1024, directory=ASSET_DIR):
+        self.pygame = pygame
+        self.files = list(EFFECT_FILES if files is None else files)
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.missing = set()
+        self.used_bytes = 0
+        self.hits = 0
+        self.loads = 0  # Files decoded from disk
+        self.decode_ns = 0  # Time spent decoding them
+        self.__sounds = OrderedDict()  # Lower-case file name -> (Sound, bytes), least recently used first
+        self.__lock = threading.Lock()
+        self.__preload_thread = None
+        self.preloaded = threading.Event()
+
+    def __contains__(self, file_name):
+        return file_name.lower() in self.__sounds
+
+    def preload(self):
+        # Decode every effect in the background so the title screen is not delayed
+        with self.__lock:
+            if self.__preload_thread is not None:
+                return
+            self.__preload_thread = threading.Thread(target=self.__preload_all, name="audio-preload", daemon=True)
+        self.__preload_thread.start()
+
+    def __preload_all(self):
+        for file_name in self.files:
+            self.get(file_name)
+        self.preloaded.set()
+
+    def __estimate_bytes(self, sound):
+        settings = self.pygame.mixer.get_init()
+        if not settings:
+            return 0
+        frequency, size, channels = settings
+        return int(sound.get_length() * frequency * channels * abs(size) // 8)
+
+    def get(self, file_name):
+        key = file_name.lower()
+        with self.__lock:
+            if key in self.__sounds:
+                self.__sounds.move_to_end(key)
+                self.hits += 1
+                return self.__sounds[key][0]
+            if key in self.missing:
+                return None
+
+        # Decode outside the lock, only a cache miss pays for disk access
+        path = find_asset(file_name, self.directory)
+        sound = None
+        if path is not None:
+            start = time.perf_counter_ns()
+            try:
+                sound = self.pygame.mixer.Sound(path)
+            except (self.pygame.error, FileNotFoundError):
+                sound = None
+            self.loads += 1
+            self.decode_ns += time.perf_counter_ns() - start
+
+        with self.__lock:
+            if sound is None:
+                self.missing.add(key)
+                return None
+            if key in self.__sounds:
+                return self.__sounds[key][0]  # Another thread decoded it first
+            size = self.__estimate_bytes(sound)
+            self.__sounds[key] = (sound, size)
+            self.used_bytes += size
+            while self.used_bytes > self.max_bytes and len(self.__sounds) > 1:
+                _, (_, evicted_size) = self.__sounds.popitem(last=False)
+                self.used_bytes -= evicted_size
+        return sound
+
+    def play(self, file_name, loops=0):
+        sound = self.get(file_name)
+        if sound is None:
+            return None
+        return sound.play(loops)
+
+
+class AudioPlayer:
+    # Plays queued jingles on one worker thread and signals completion with an Event,
+    # so game logic never spins on the mixer waiting for a sound to finish
+    def __init__(self, cache):
+        self.cache = cache
+        self.__queue = queue.Queue()
+        self.__thread = None
+        self.__lock = threading.Lock()
+        self.sequences = 0
+
+    def play_sequence(self, file_names, on_finished=None):
+        finished = threading.Event()
+        with self.__lock:
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__run, name="audio-player", daemon=True)
+                self.__thread.start()
+        self.__queue.put((list(file_names), on_finished, finished))
+        self.sequences += 1
+        return finished
+
+    def __run(self):
+        while True:
+            file_names, on_finished, finished = self.__queue.get()
+            for file_name in file_names:
+                sound = self.cache.get(file_name)
+                if sound is None:
+                    continue
+                sound.play()
+                # Sleep for exactly the length of the jingle instead of polling get_busy()
+                finished.wait(sound.get_length())
+            try:
+                if on_finished is not None:
+                    on_finished()
+            finally:
+                finished.set()
+
+
+class NullAudioBackend:
+    # Silent backend for tests, bots and server workers
+    def preload(self):
+        pass
+
+    def play_music(self, file_name, loops=0):
+        return False
+
+    def stop_music(self):
+        pass
+
+    def play_effect(self, file_name):
+        return None
+
+    def play_jingles(self, file_names, on_finished=None):
+        if on_finished is not None:
+            on_finished()
+        return None
+
+    def stats(self):
+        return {}
+
+
+class PygameAudioBackend:
+    def __init__(self):
+        import pygame
+        self.pygame = pygame
+        pygame.mixer.init()  # Only the mixer, not every SDL subsystem
+        self.cache = AudioCache(pygame)
+        self.player = AudioPlayer(self.cache)
+
+    def preload(self):
+        self.cache.preload()  # Decoded once per process in the background
+
+    def play_music(self, file_name, loops=0):
+        # Stream a long track, quietly skipping files that are not shipped with the game
+        path = find_asset(file_name)
+        if path is None:
+            return False
+        try:
+            self.pygame.mixer.music.load(path)
+        except self.pygame.error:
+            return False
+        self.pygame.mixer.music.play(loops)
+        return True
+
+    def stop_music(self):
+        self.pygame.mixer.music.stop()
+
+    def play_effect(self, file_name):
+        return self.cache.play(file_name)
+
+    def play_jingles(self, file_names, on_finished=None):
+        return self.player.play_sequence(file_names, on_finished)
+
+    def stats(self):
+        cache = self.cache
+        return {"cache_hits": cache.hits, "loads": cache.loads, "decode_seconds": cache.decode_ns / 1e9,
+                "jingle_sequences": self.player.sequences}
+
+
+null_audio = NullAudioBackend()
+_pygame_audio = None
+
+
+def get_backend(audio):
+    # True picks the shared pygame backend, False or None the silent one,
+    # anything else is assumed to already be a backend object
+    global _pygame_audio
+    if audio is True:
+        if _pygame_audio is None:
+            _pygame_audio = PygameAudioBackend()
+        return _pygame_audio
+    if audio is None or audio is False:
+        return null_audio
+    return audio
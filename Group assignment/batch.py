@@ -0,0 +1,183 @@
+import numpy as np
+
+from matcher import COMMANDS
+from OopGroup2023 import OUTCOME_CODES, OUTCOMES, TRAIN_MURDER
+
+# Struct-of-arrays session store for bulk simulation. N sessions live in a handful of NumPy
+# arrays and one command per session is applied to the whole batch at once. Needs numpy,
+# which the console game and the server do not.
+
+# Command opcodes, one per session and step
+NOOP, START, QUIT, EXAMINE, INTERACT, CARRIAGE, ARREST, REVIEW, INVALID = range(9)
+OPCODES = {"s": START, "q": QUIT, "e": EXAMINE, "i": INTERACT, "c": CARRIAGE, "a": ARREST, "r": REVIEW}
+
+RUNNING = OUTCOME_CODES[None]
+WON = OUTCOME_CODES["won"]
+LOST = OUTCOME_CODES["lost"]
+TIMEOUT = OUTCOME_CODES["timeout"]
+QUIT_CODE = OUTCOME_CODES["quit"]
+
+
+def _words(bits):
+    return max(1, (bits + 63) // 64)
+
+
+def _mask_row(positions, words):
+    row = np.zeros(words, np.uint64)
+    for position in positions:
+        row[position >> 6] |= np.uint64(1 << (position & 63))
+    return row
+
+
+class SessionBatch:
+    # Flags and clues are bit matrices of 64-bit words, so scenarios of any size fit. The flag
+    # bits match Game.flags and the clue bits match the scenario's clue ids.
+    __slots__ = ("scenario", "size", "started", "flags", "clues", "remaining", "outcome", "clues_found",
+                 "arrested", "__bit_clues", "__group_bit", "__carriage_bit", "__carriage_password",
+                 "__passwords", "__bit_values", "__arrest_outcome")
+
+    def __init__(self, size, scenario=None, round_duration=None):
+        self.scenario = TRAIN_MURDER if scenario is None else scenario
+        self.size = size
+        scenario = self.scenario
+        flag_words = _words(scenario.flag_count)
+        clue_words = _words(len(scenario.clues))
+
+        self.started = np.zeros(size, np.bool_)
+        self.flags = np.zeros((size, flag_words), np.uint64)  # Game.flags: doors, groups and the crime scene
+        self.clues = np.zeros((size, clue_words), np.uint64)  # Bit i set once scenario.clues[i] is found
+        self.remaining = np.full(size, scenario.round_duration if round_duration is None else round_duration,
+                                 np.float64)
+        self.outcome = np.zeros(size, np.uint8)  # OUTCOME_CODES
+        self.clues_found = np.zeros(size, np.int32)  # PlayerStats.clues_found
+        self.arrested = np.zeros(size, np.int16)  # Lineup number of the arrested character, 0 for none
+
+        # Transition tables: flag bit position -> clues it unlocks, command argument -> flag bit position
+        bit_clues = np.zeros((scenario.flag_count, clue_words), np.uint64)
+        for action in scenario.actions:
+            if action.bit:
+                bit_clues[action.bit.bit_length() - 1] = _mask_row(action.clues, clue_words)
+        self.__bit_clues = bit_clues
+        positions = np.arange(scenario.flag_count, dtype=np.uint64)
+        self.__bit_values = np.left_shift(np.uint64(1), positions & np.uint64(63))  # Bit within its word
+
+        # Indexed by group, carriage or lineup number. Slot 0 stands for every out-of-range number.
+        size = max(max(scenario.groups), len(scenario.carriages), len(scenario.lineup)) + 1
+        self.__group_bit = np.full(size, -1, np.int64)
+        for number, group in scenario.groups.items():
+            self.__group_bit[number] = group.bit.bit_length() - 1
+
+        self.__passwords = {}
+        self.__carriage_bit = np.full(size, -1, np.int64)
+        self.__carriage_password = np.full(size, -2, np.int64)  # Never equal to a given password id
+        for carriage in scenario.carriages:
+            self.__carriage_bit[carriage.number] = carriage.bit.bit_length() - 1
+            self.__carriage_password[carriage.number] = self.__passwords.setdefault(
+                carriage.password_key, len(self.__passwords))
+
+        self.__arrest_outcome = np.full(size, RUNNING, np.uint8)
+        for number in range(1, len(scenario.lineup) + 1):
+            self.__arrest_outcome[number] = WON if number == scenario.culprit_number else LOST
+
+    def encode(self, commands):
+        # Turn command tuples such as ("c", 2, "4545") into the (op, arg, password) arrays step_batch() takes
+        size = len(commands)
+        op = np.full(size, NOOP, np.uint8)
+        arg = np.full(size, -1, np.int64)
+        password = np.full(size, -1, np.int64)
+        for row, command in enumerate(commands):
+            if command is None:
+                continue
+            if isinstance(command, str):
+                command = (command,)
+            op[row] = OPCODES.get(COMMANDS.match(command[0]), INVALID)
+            if len(command) > 1:
+                try:
+                    arg[row] = int(command[1])
+                except ValueError:
+                    pass
+            if len(command) > 2:
+                password[row] = self.__passwords.get(self.scenario.passwords.match(command[2]), -1)
+        return op, arg, password
+
+    def step_batch(self, op, arg=None, password=None, elapsed=0.0):
+        # Apply one command per session. op holds opcodes, arg the group, carriage or lineup number
+        # and password the id of the password given (-1 for a wrong one). elapsed is the time each
+        # player spent on the command, sessions whose clock runs out time out instead.
+        op = np.asarray(op, np.uint8)
+        arg = np.full(self.size, -1, np.int64) if arg is None else np.asarray(arg, np.int64)
+        password = np.full(self.size, -1, np.int64) if password is None else np.asarray(password, np.int64)
+
+        # Sessions that have finished, or get no command this step, see NOOP
+        live = (self.outcome == RUNNING) & (op != NOOP)
+        if np.any(elapsed):
+            self.remaining[live] -= np.broadcast_to(elapsed, self.size)[live]
+            expired = live & (self.remaining <= 0)
+            self.outcome[expired] = TIMEOUT
+            live &= ~expired
+        op = np.where(live, op, NOOP)
+
+        waiting = ~self.started
+        self.started |= op == START
+        self.outcome[op == QUIT] = QUIT_CODE
+        op[waiting] = NOOP  # Only START and QUIT mean anything before the game has started
+
+        examine = op == EXAMINE
+        interact = op == INTERACT
+        self.clues_found += examine | interact  # Interactions count before the group number is checked
+        rows = np.flatnonzero(examine)
+        self.__unlock(rows, np.full(rows.size, self.scenario.examination.bit.bit_length() - 1, np.int64))
+
+        arg = np.where((arg > 0) & (arg < self.__group_bit.size), arg, 0)
+        rows = np.flatnonzero(interact)
+        positions = self.__group_bit[arg[rows]]
+        keep = positions >= 0
+        self.__unlock(rows[keep], positions[keep])
+
+        rows = np.flatnonzero(op == CARRIAGE)
+        numbers = arg[rows]
+        correct = self.__carriage_password[numbers] == password[rows]
+        self.__unlock(rows[correct], self.__carriage_bit[numbers[correct]])
+
+        rows = np.flatnonzero(op == ARREST)
+        numbers = arg[rows]
+        outcomes = self.__arrest_outcome[numbers]
+        keep = outcomes != RUNNING
+        self.arrested[rows[keep]] = numbers[keep]
+        self.outcome[rows[keep]] = outcomes[keep]
+
+    def __unlock(self, rows, positions):
+        # Set each row's flag bit and add its clues, unless the bit was already set (a repeat visit)
+        if not rows.size:
+            return
+        bits = self.__bit_values[positions]
+        if self.flags.shape[1] == 1:
+            flags = self.flags[:, 0]  # One-word matrices take the much cheaper 1-D indexing path
+            new = (flags[rows] & bits) == 0
+            rows, bits, positions = rows[new], bits[new], positions[new]
+            flags[rows] |= bits
+        else:
+            words = positions >> 6
+            new = (self.flags[rows, words] & bits) == 0
+            rows, words, bits, positions = rows[new], words[new], bits[new], positions[new]
+            self.flags[rows, words] |= bits
+        if self.clues.shape[1] == 1:
+            clues = self.clues[:, 0]
+            clues[rows] |= self.__bit_clues[positions, 0]
+        else:
+            self.clues[rows] |= self.__bit_clues[positions]
+
+    def flags_of(self, row):
+        # The session's flags as the int Game.flags would hold
+        return int.from_bytes(self.flags[row].astype("<u8").tobytes(), "little")
+
+    def clue_ids(self, row):
+        mask = int.from_bytes(self.clues[row].astype("<u8").tobytes(), "little")
+        return [clue_id for clue_id in range(len(self.scenario.clues)) if mask >> clue_id & 1]
+
+    def outcome_of(self, row):
+        return OUTCOMES[int(self.outcome[row])]
+
+    def outcome_counts(self):
+        counts = np.bincount(self.outcome, minlength=len(OUTCOMES))
+        return {OUTCOMES[code]: int(count) for code, count in enumerate(counts) if count}
@@ -0,0 +1,87 @@
+# Streams session analytics through the aggregator: checks its figures against a computation
+# over the whole list, then shows that peak memory stays flat as the number of sessions grows.
+# Run from the "Group assignment" folder: python benchmarks/bench_analytics.py [--sessions N]
+import argparse
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OopGroup2023 import Game
+from analytics import TIME_RESOLUTION, Aggregator, AnalyticsWriter, read_records
+from playtest import RandomPlayer, play
+
+
+def sample_lines(games, events=True):
+    # Records of simulated games, with the simulated clock as the time taken
+    rng = random.Random(3)
+    stream = io.StringIO()
+    writer = AnalyticsWriter(stream, events)
+    for _ in range(games):
+        game = Game(audio=False)
+        _, seconds = play(game, RandomPlayer(game.scenario, rng), rng, (5.0, 40.0))
+        game.player_stats.end_time = game.player_stats.start_time + seconds
+        writer.write_game(game)
+    return stream.getvalue().splitlines(keepends=True)
+
+
+def check(lines):
+    aggregator = Aggregator().consume(json.loads(line) for line in lines)
+    sessions = [record for record in map(json.loads, lines) if record["type"] == "session"]
+    assert aggregator.sessions == len(sessions)
+    wins = sum(record["outcome"] == "won" for record in sessions)
+    assert aggregator.win_rate() == wins / len(sessions)
+    times = [record["end"] - record["start"] for record in sessions if record["outcome"] in ("won", "lost")]
+    assert abs(aggregator.arrest_time_quantile(0.5) - statistics.median_low(times)) <= 1 / TIME_RESOLUTION
+    failed = Counter(record["args"][0] for record in map(json.loads, lines)
+                     if record["type"] == "event" and record["code"] == "password_wrong")
+    assert {carriage: count for (_, carriage), count in aggregator.failed_passwords.items()} == failed
+    return aggregator
+
+
+def write_file(path, lines, sessions):
+    # Repeat the sample until the file holds the requested number of sessions
+    per_copy = sum(line.startswith('{"type":"session"') for line in lines)
+    with open(path, "w", encoding="utf-8") as file:
+        for _ in range(sessions // per_copy):
+            file.writelines(lines)
+
+
+def measure(path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    aggregator = Aggregator().consume(read_records([path]))
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return aggregator, elapsed, peak
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=200000)
+    args = parser.parse_args()
+
+    aggregator = check(sample_lines(2000))
+    print(f"check: {aggregator.sessions} sessions agree with the in-memory computation")
+    summary = aggregator.summary()
+    print(f"  win rate {summary['win_rate']:.2%}, median time to arrest {summary['median_time_to_arrest']} s, "
+          f"most failed passwords {summary['most_failed_passwords'][:3]}")
+
+    lines = sample_lines(1000, events=False)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sessions.ndjson")
+        for sessions in (args.sessions // 10, args.sessions):
+            write_file(path, lines, sessions)
+            size = os.path.getsize(path)
+            aggregator, elapsed, peak = measure(path)
+            print(f"{aggregator.sessions:>8} sessions, {size / 1e6:>6.1f} MB: {aggregator.sessions / elapsed:>8.0f} "
+                  f"sessions/s under tracemalloc, peak memory {peak / 1024:>6.0f} KiB")
@@ -0,0 +1,100 @@
+# Checks SessionBatch against the object engine on random command streams, then compares
+# their throughput. Run from the "Group assignment" folder: python benchmarks/bench_batch.py
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OopGroup2023 import ERROR, TRAIN_MURDER, Game
+from batch import ARREST, CARRIAGE, EXAMINE, INTERACT, QUIT, REVIEW, START, SessionBatch
+
+
+def random_command(rng, scenario):
+    # Everything the menu accepts, including wrong passwords, wrong arrests and bad numbers
+    kind = rng.randrange(8)
+    if kind == 0:
+        return ("e",)
+    if kind == 1:
+        return ("i", rng.randint(0, len(scenario.groups) + 1))
+    if kind in (2, 3):
+        number = rng.randint(0, len(scenario.carriages) + 1)
+        carriage = scenario.carriages[(number - 1) % len(scenario.carriages)]
+        return ("c", number, rng.choice((carriage.password, carriage.password.upper(), "1234")))
+    if kind == 4:
+        return ("a", rng.randint(0, len(scenario.lineup) + 1)) if rng.random() < 0.2 else ("r",)
+    if kind == 5:
+        return rng.choice((("x",), ("s", "Agent"), ("r",)))
+    if kind == 6 and rng.random() < 0.05:
+        return ("q",)
+    return ("i", rng.randint(1, len(scenario.groups)))
+
+
+def check_parity(sessions=3000, steps=25, seed=1):
+    rng = random.Random(seed)
+    scenario = TRAIN_MURDER
+    games = [Game(audio=False, log_level=ERROR) for _ in range(sessions)]
+    batch = SessionBatch(sessions)
+    lineup = {character._name: number for number, character in enumerate(scenario.lineup, start=1)}
+    for step in range(steps):
+        if step == 0:
+            commands = [("s", "Agent") if rng.random() < 0.9 else rng.choice((("q",), ("x",))) for _ in games]
+        else:
+            commands = [random_command(rng, scenario) for _ in games]
+        for game, command in zip(games, commands):
+            if game.running:
+                game.step(command)
+        batch.step_batch(*batch.encode(commands))
+
+    for row, game in enumerate(games):
+        clue_ids = sorted({scenario.clue_index[clue] for clue in game.clues})
+        decisions = game.player_stats.decisions_made
+        arrested = lineup[decisions[-1][len("Arrested "):]] if decisions else 0
+        expected = (game.flags, clue_ids, game.outcome, game.player_stats.clues_found, arrested)
+        actual = (batch.flags_of(row), batch.clue_ids(row), batch.outcome_of(row), int(batch.clues_found[row]),
+                  int(batch.arrested[row]))
+        assert expected == actual, f"Session {row} differs: {expected} != {actual}"
+    return batch.outcome_counts()
+
+
+def object_throughput(sessions=20000, steps=20, seed=2):
+    rng = random.Random(seed)
+    games = [Game(audio=False, log_level=ERROR) for _ in range(sessions)]
+    streams = [[("s", "Agent")] + [random_command(rng, TRAIN_MURDER) for _ in range(steps - 1)] for _ in games]
+    commands = 0
+    start = time.perf_counter()
+    for step in range(steps):
+        for game, stream in zip(games, streams):
+            if game.running:
+                game.step(stream[step])
+                commands += 1
+    return commands / (time.perf_counter() - start)
+
+
+def batch_throughput(sessions=1000000, steps=20, seed=3):
+    rng = np.random.default_rng(seed)
+    batch = SessionBatch(sessions)
+    # Roughly the same command mix random_command() gives the object engine
+    ops = rng.choice(np.array([EXAMINE, INTERACT, CARRIAGE, REVIEW, ARREST, QUIT], np.uint8),
+                     p=[0.125, 0.36, 0.25, 0.23, 0.025, 0.01], size=(steps, sessions))
+    ops[0] = START
+    args = rng.integers(1, 4, size=(steps, sessions))
+    passwords = rng.integers(-1, 3, size=(steps, sessions))
+    commands = 0
+    start = time.perf_counter()
+    for step in range(steps):
+        commands += int(np.count_nonzero(batch.outcome == 0))
+        batch.step_batch(ops[step], args[step], passwords[step])
+    return commands / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    print(f"Parity with the object engine: ok {check_parity()}")
+    objects = object_throughput()
+    arrays = batch_throughput()
+    print(f"Object engine:       {objects:>14,.0f} commands/s")
+    print(f"SessionBatch (N=1M): {arrays:>14,.0f} commands/s")
+    print(f"Speedup: {arrays / objects:.0f}x (target 100x)")
@@ -0,0 +1,216 @@
+# Scenarios packed into memory-mapped asset bundles: a check that bundled scenarios play exactly
+# like the files they were packed from, text lookups per second, what reading the narrative from
+# the bundle costs the engine, and how much memory each of several worker processes holds as
+# the scenario grows longer and as its texts grow wordier. Linux only, memory comes from
+# /proc/self/smaps_rollup.
+# Run from the "Group assignment" folder: python benchmarks/bench_bundle.py
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from OopGroup2023 import CHARACTER_KINDS, ERROR, TRAIN_MURDER, Game
+from bench_engine import WINNING_PLAYTHROUGH
+from bundle import AssetBundle, write_bundle
+from scenario import SCENARIO_DIR, SKELETON_ID, bundle_scenario, load_scenario, translatable
+from synthetic import synthetic_scenario
+
+WORKERS = 4
+PROSE = ("The corridor smells of coal smoke and polish, and the lamps sway with every bend in the line. "
+         "Somewhere ahead a door bangs, and a steward hurries past without meeting your eye.")
+
+
+def narrative_scenario(carriages, wordiness=1):
+    # A synthetic train with a few lines of narrative, dialogue and clue per carriage and group,
+    # like a written one. wordiness repeats the prose in each of them.
+    prose = " ".join([PROSE] * wordiness)
+    data = synthetic_scenario(carriages, max(50, carriages // 5))
+    for number, spec in enumerate(data["carriages"], start=1):
+        spec["approach"] = [f"Carriage {number}. {prose}", prose]
+        spec["success"] = [f"The lock of carriage {number} gives way. {prose}"]
+        spec["clue"] += ". " + prose
+        spec["failure"] = f"The lock of carriage {number} holds. {prose}"
+        spec["visited"] = f"You have searched carriage {number} already. {prose}"
+    for group in data["interact"]["groups"]:
+        group["intro"] += " " + prose
+        group["clues"] = [clue + ". " + prose for clue in group["clues"]]
+        group["repeat"] += " " + prose
+    for character in data["characters"].values():
+        character["dialogue"] += " " + prose
+    return data
+
+
+def translation(texts):
+    # Every narrative text again, standing in for a second language
+    return {key: [f"[ga] {line}" for line in text] if isinstance(text, tuple) else f"[ga] {text}"
+            for key, text in texts.items() if key != SKELETON_ID and translatable(key)}
+
+
+def write_files(directory, name, data):
+    # The scenario file, its bundle with a translation, and the bundle's texts as plain JSON
+    json_path = os.path.join(directory, f"{name}.json")
+    with open(json_path, "w", encoding="utf-8") as file:
+        json.dump(data, file)
+    bundle_path = os.path.join(directory, f"{name}.bundle")
+    texts = bundle_scenario(data, CHARACTER_KINDS, {"ga": translation(bundle_scenario(data, CHARACTER_KINDS))})
+    write_bundle(bundle_path, texts)
+    with open(os.path.join(directory, f"{name}.texts.json"), "w", encoding="utf-8") as file:
+        json.dump(texts, file)
+    return json_path, bundle_path
+
+
+def chain(scenario, carriages):
+    # Start, examine, open carriages in order, repeat one, talk, review and arrest
+    commands = [("s", "Agent"), ("e",), ("e",)]
+    commands += [("c", number, scenario.carriages[number - 1].password) for number in range(1, carriages + 1)]
+    return commands + [("c", 1), ("c", 2, "wrong"), ("i", 1), ("i", 1), ("r",), ("a", 2)]
+
+
+def play(scenario, commands):
+    game = Game(audio=False, log_level=ERROR, scenario=scenario)
+    results = [game.begin()] + [game.step(command) for command in commands]
+    return [([line for line in result.lines if not line.startswith("Time remaining")], result.prompt,
+             result.outcome) for result in results]  # The clock differs between any two runs
+
+
+def check_parity(json_path, bundle_path, carriages, translated=True):
+    plain = load_scenario(json_path, CHARACTER_KINDS)
+    bundled = load_scenario(bundle_path, CHARACTER_KINDS)
+    commands = chain(plain, carriages)
+    assert play(plain, commands) == play(bundled, commands)
+    if translated:
+        irish = load_scenario(bundle_path, CHARACTER_KINDS, locale="ga")
+        assert irish.carriages[0].failure == "[ga] " + plain.carriages[0].failure
+        assert irish.carriages[0].label == plain.carriages[0].label  # Labels are not bundled
+    return len(commands)
+
+
+def lookup_rate(bundle_path, lookups=50000):
+    bundle = AssetBundle(bundle_path)
+    ids = list(bundle.ids())
+    table = {key: bundle.get(key) for key in ids}
+    sample = [random.Random(5).choice(ids) for _ in range(lookups)]
+    rates = []
+    for get in (bundle.get, table.get):
+        start = time.perf_counter()
+        for key in sample:
+            get(key)
+        rates.append(lookups / (time.perf_counter() - start))
+    bundle.close()
+    return len(ids), rates
+
+
+def engine_rate(scenario, sessions=2000):
+    games = [Game(audio=False, log_level=ERROR, scenario=scenario) for _ in range(sessions)]
+    start = time.perf_counter()
+    for game in games:
+        for command in WINNING_PLAYTHROUGH:
+            game.step(command)
+    return sessions * len(WINNING_PLAYTHROUGH) / (time.perf_counter() - start)
+
+
+def memory_kib():
+    # Anonymous memory is this process's own; Pss also charges it a share of mapped files
+    values = {}
+    with open("/proc/self/smaps_rollup") as file:
+        for line in file:
+            field, _, rest = line.partition(":")
+            if field in ("Anonymous", "Pss"):
+                values[field] = int(rest.split()[0])
+    return values["Anonymous"], values["Pss"]
+
+
+def hold_texts(path, carriages):
+    # Every text read once, from a dict loaded out of JSON or from the bundle
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as file:
+            texts = json.load(file)
+        for key in texts:
+            texts.get(key)
+        return texts
+    texts = AssetBundle(path)
+    for key in texts.ids():
+        texts.get(key)
+    return texts
+
+
+def hold_scenario(path, carriages):
+    # The scenario, with one game through every carriage and every group's narrative shown
+    scenario = load_scenario(path, CHARACTER_KINDS)
+    game = Game(audio=False, log_level=ERROR, scenario=scenario)
+    for command in chain(scenario, carriages):
+        game.step(command)
+    for group in scenario.groups.values():
+        group.intro, group.repeat
+    return scenario, game
+
+
+def worker(hold, path, carriages, barrier, results):
+    # Measured while every worker holds the same file
+    before = memory_kib()
+    held = hold(path, carriages)
+    barrier.wait()
+    after = memory_kib()
+    results.put((after[0] - before[0], after[1] - before[1]))
+    barrier.wait()
+    del held
+
+
+def worker_memory(hold, path, carriages):
+    context = multiprocessing.get_context("spawn")  # Fresh interpreters, nothing inherited
+    barrier = context.Barrier(WORKERS)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(hold, path, carriages, barrier, results))
+                 for _ in range(WORKERS)]
+    for process in processes:
+        process.start()
+    measured = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return (sum(anonymous for anonymous, _ in measured) / WORKERS, sum(pss for _, pss in measured) / WORKERS)
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        train_json = os.path.join(SCENARIO_DIR, "train_murder.json")
+        train_bundle = os.path.join(directory, "train_murder.bundle")
+        with open(train_json, encoding="utf-8") as file:
+            write_bundle(train_bundle, bundle_scenario(json.load(file), CHARACTER_KINDS))
+        commands = check_parity(train_json, train_bundle, len(TRAIN_MURDER.carriages), False)
+        for carriages in (100, 1000, 10000):
+            paths = write_files(directory, f"train_{carriages}", narrative_scenario(carriages))
+            commands += check_parity(*paths, min(carriages, 200))
+        print(f"parity: bundled scenarios played {commands} commands exactly like their JSON files")
+
+        count, (bundle_rate, dict_rate) = lookup_rate(os.path.join(directory, "train_10000.bundle"))
+        print(f"lookups: {count} texts, {bundle_rate:>9.0f}/s from the bundle, {dict_rate:>9.0f}/s from a dict")
+
+        bundled = load_scenario(train_bundle, CHARACTER_KINDS)
+        plain = bundled_rate = 0.0
+        for _ in range(3):
+            plain = max(plain, engine_rate(TRAIN_MURDER))
+            bundled_rate = max(bundled_rate, engine_rate(bundled))
+        print(f"engine: {plain:>9.0f} commands/s from JSON, {bundled_rate:>9.0f} from the bundle")
+
+        print(f"memory per worker, {WORKERS} workers              anonymous KiB    PSS KiB  file MB")
+        for hold, kind in ((hold_texts, "texts"), (hold_scenario, "scenario")):
+            for carriages in (100, 1000, 10000):
+                for suffix in ("texts.json" if hold is hold_texts else "json", "bundle"):
+                    path = os.path.join(directory, f"train_{carriages}.{suffix}")
+                    anonymous, pss = worker_memory(hold, path, carriages)
+                    print(f"{kind:>8} {carriages:>6} carriages {suffix.split('.')[-1]:>7} {anonymous:>16.0f} "
+                          f"{pss:>10.0f} {os.path.getsize(path) / 1e6:>8.1f}")
+
+        # The same train with wordier texts: a bundled scenario holds the same whatever its texts
+        for wordiness in (1, 4, 16):
+            paths = write_files(directory, f"wordy_{wordiness}", narrative_scenario(1000, wordiness))
+            for path in paths:
+                anonymous, pss = worker_memory(hold_scenario, path, 1000)
+                print(f"scenario   1000 carriages x{wordiness:<2} {os.path.splitext(path)[1][1:]:>6} {anonymous:>13.0f} "
+                      f"{pss:>10.0f} {os.path.getsize(path) / 1e6:>8.1f}")
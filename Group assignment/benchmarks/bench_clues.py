@@ -0,0 +1,62 @@
+# Insert and query cost of the clue store at 100k clues per scene, against a plain list scan.
+# Run from the "Group assignment" folder: python benchmarks/bench_clues.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clues import ClueInfo, ClueStore
+
+KINDS = ("scene", "testimony", "interview", "evidence")
+
+
+def make_clues(count, carriages=300):
+    infos = []
+    for i in range(count):
+        tags = [KINDS[i % len(KINDS)]]
+        if i % 50 == 0:
+            tags.append("passcode")
+        text = f"\033[94mClue {i}: a {KINDS[i % 4]} about carriage {i % carriages + 1} and delegate {i % 997}\033[0m"
+        infos.append(ClueInfo(text, tags, f"Delegate {i % 997}", (i % carriages + 1,)))
+    return infos
+
+
+def timed(function, repeats=1):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = function()
+    return result, (time.perf_counter() - start) / repeats
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    infos = make_clues(count)
+    store = ClueStore()
+    _, seconds = timed(lambda: [store.add(info.text, info) for info in infos])
+    print(f"insert:              {seconds / count * 1e6:8.3f} us per clue ({count} clues)")
+    _, seconds = timed(lambda: [store.add(info.text, info) for info in infos[:10000]])
+    print(f"duplicate insert:    {seconds / 10000 * 1e6:8.3f} us per clue")
+    _, seconds = timed(lambda: store.tagged("passcode"))
+    print(f"first query (index): {seconds * 1000:8.3f} ms")
+
+    plain = list(store)
+    queries = [
+        ("all passcodes", lambda: store.tagged("passcode"),
+         lambda: [clue for clue in plain if "passcode" in clue.tags]),
+        ("about carriage 2", lambda: store.about_carriage(2),
+         lambda: [clue for clue in plain if 2 in clue.carriages]),
+        ("from one source", lambda: store.from_source("Delegate 7"),
+         lambda: [clue for clue in plain if clue.source == "Delegate 7"]),
+        ("search 'delegate 7'", lambda: store.search("delegate 7"),
+         lambda: [clue for clue in plain if {"delegate", "7"} <= clue.info.words]),
+        ("exact text", lambda: store.get(infos[-1].text),
+         lambda: next(clue for clue in plain if clue.text == infos[-1].text)),
+    ]
+    print(f"{'query':>20} {'indexed us':>11} {'scan us':>10} {'results':>8}")
+    for name, indexed, scan in queries:
+        result, fast = timed(indexed, 1000)
+        expected, slow = timed(scan, 5)
+        assert (list(result) if isinstance(result, (list, tuple)) else result) == expected, name
+        size = len(result) if isinstance(result, (list, tuple)) else 1
+        print(f"{name:>20} {fast * 1e6:>11.2f} {slow * 1e6:>10.0f} {size:>8}")
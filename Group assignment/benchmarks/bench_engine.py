@@ -0,0 +1,28 @@
+# Steps many headless sessions through a winning playthrough and reports commands per second.
+# Run from the "Group assignment" folder: python benchmarks/bench_engine.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OopGroup2023 import Game
+
+WINNING_PLAYTHROUGH = [("s", "Agent"), ("e",), ("c", 1, "6969"), ("i", 2), ("c", 2, "4545"),
+                       ("c", 3, "oscail an doras"), ("r",), ("a", 1)]
+
+
+def measure(sessions):
+    games = [Game(audio=False) for _ in range(sessions)]
+    start = time.perf_counter()
+    for command in WINNING_PLAYTHROUGH:
+        for game in games:
+            game.step(command)
+    elapsed = time.perf_counter() - start
+    assert all(game.outcome == "won" for game in games)
+    return sessions * len(WINNING_PLAYTHROUGH) / elapsed
+
+
+if __name__ == "__main__":
+    for n in (100, 1000, 10000):
+        print(f"{n:>6} sessions: {measure(n):>10.0f} commands/s")
@@ -0,0 +1,153 @@
+# Checks that replaying the command journal rebuilds every session exactly and that a journal
+# reopened after a crash tore its last record stays readable, then reports what journaling costs
+# the engine and how many records per second replay gets through.
+# Run from the "Group assignment" folder: python benchmarks/bench_journal.py
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from OopGroup2023 import ERROR, Game
+from bench_engine import WINNING_PLAYTHROUGH
+from journal import JOURNAL_HEADER, RECORD, Journal, Replayer, replay
+from playtest import RandomPlayer, play
+from pool import SessionPool
+
+ODD_INPUT = [("x",), ("s", "Agent"), ("s",), ("i", "two"), ("i", 99), ("c", "one"), ("c", 3, "wrong"),
+             ("c", 1, "6969"), ("c", 1), ("a", "nobody"), ("a", 7), ("r",), ("q",)]
+
+
+def state(game):
+    stats = game.player_stats
+    return (game.flags, game.clues, stats.clues_found, stats.decisions_made, stats.wrong_passwords,
+            stats.start_time, stats.end_time, game.outcome, game.running)
+
+
+def replayed_state(session):
+    return (session.flags, session.clues, session.clues_found, session.decisions, session.wrong_passwords,
+            session.start_time, session.end_time, session.outcome, session.running)
+
+
+def journal_bytes(journal):
+    journal.flush()
+    return journal.stream.getvalue()
+
+
+def check_parity(games=3000):
+    rng = random.Random(7)
+    journal = Journal(io.BytesIO())
+    pool = SessionPool(journal=journal, log_level=ERROR)
+    finished = {}
+    for number in range(games):
+        game = pool.acquire()
+        if number % 3 == 0:
+            game.round_duration = 120 + number % 7
+            game.begin()
+        if number % 10 == 0:
+            for command in ODD_INPUT[:rng.randrange(len(ODD_INPUT))]:
+                game.step(command)
+            if number % 20 == 0:
+                if game.running:
+                    game.feed("i")  # Cut off at the group prompt
+                game.abandon()  # The player disconnected
+        else:
+            play(game, RandomPlayer(game.scenario, rng), rng, (5.0, 40.0))
+        if game.journal_session is not None:  # Games that recorded nothing are not in the journal
+            finished[game.journal_session] = state(game)
+        if number % 4:
+            pool.release(game)  # Recycled, so the next game reuses it under a new session number
+    half = pool.acquire()
+    half.step(("s", "Agent"))
+    half.feed("c")
+    half.feed("2")  # Waiting for a password when the process "crashes"
+    finished[half.journal_session] = state(half)
+
+    data = journal_bytes(journal)
+    replayer = Replayer()
+    header = JOURNAL_HEADER.size + JOURNAL_HEADER.unpack_from(data)[2]
+    replayer.feed(memoryview(data)[header:])
+    for session, expected in finished.items():
+        got = replayed_state(replayer.sessions[session])
+        assert got == expected, f"session {session}: {got} != {expected}"
+        restored = replayer.sessions[session].restore()
+        assert (restored.flags, restored.clues, restored.outcome) == expected[0:2] + expected[7:8]
+    return len(finished), replayer.records
+
+
+def journal_overhead(sessions=5000):
+    def measure(journal):
+        games = [Game(audio=False, journal=journal) for _ in range(sessions)]
+        start = time.perf_counter()
+        for command in WINNING_PLAYTHROUGH:
+            for game in games:
+                game.step(command)
+        return sessions * len(WINNING_PLAYTHROUGH) / (time.perf_counter() - start)
+    plain = journaled = 0.0
+    for _ in range(3):
+        plain = max(plain, measure(None))
+        journaled = max(journaled, measure(Journal(io.BytesIO())))
+    return plain, journaled
+
+
+def large_journal(records):
+    # Days of traffic in miniature: a recorded mix of sessions repeated under fresh session numbers
+    rng = random.Random(11)
+    journal = Journal(io.BytesIO())
+    for _ in range(2000):
+        game = Game(audio=False, log_level=ERROR, journal=journal)
+        play(game, RandomPlayer(game.scenario, rng), rng, (5.0, 40.0))
+    data = journal_bytes(journal)
+    body = data[JOURNAL_HEADER.size + JOURNAL_HEADER.unpack_from(data)[2]:]
+    sample = list(RECORD.iter_unpack(body))
+    copies = records // len(sample) + 1
+    parts = [data[:len(data) - len(body)]]
+    for copy in range(copies):
+        offset = copy * journal.next_session
+        parts.append(b"".join(RECORD.pack(when, session + offset, number, password, op)
+                              for when, session, number, password, op in sample))
+    return b"".join(parts), copies * journal.next_session
+
+
+def check_torn_tail():
+    # A crash mid-write leaves part of a record; sessions journaled after reopening must survive
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "torn.journal")
+        for session in range(2):
+            journal = Journal.open(path)
+            game = Game(audio=False, log_level=ERROR, journal=journal)
+            for command in WINNING_PLAYTHROUGH:
+                game.step(command)
+            journal.close()
+            if session == 0:
+                with open(path, "ab") as file:
+                    file.write(RECORD.pack(0.0, 0, 0, 0, 0)[:RECORD.size // 2])
+        replayer = replay(path)
+        assert replayer.skipped == 0
+        assert [state.outcome for state in replayer.sessions.values()] == ["won", "won"]
+
+
+if __name__ == "__main__":
+    sessions, records = check_parity()
+    print(f"parity: {sessions} sessions rebuilt exactly from {records} records")
+    check_torn_tail()
+    print("torn tail: a session journaled after reopening a torn journal replays intact")
+
+    plain, journaled = journal_overhead()
+    print(f"engine: {plain:>9.0f} commands/s plain, {journaled:>9.0f} journaled "
+          f"({(plain - journaled) / plain:+.1%} cost)")
+
+    data, session_count = large_journal(2_000_000)
+    print(f"journal: {len(data) / 1e6:.1f} MB, {RECORD.size} bytes per record")
+    best = 0.0
+    for _ in range(3):
+        start = time.perf_counter()
+        replayer = Replayer().read(io.BytesIO(data))
+        elapsed = time.perf_counter() - start
+        best = max(best, replayer.records / elapsed)
+    assert len(replayer.sessions) == session_count
+    print(f"replay: {replayer.records} records, {session_count} sessions, {best:>10.0f} records/s")
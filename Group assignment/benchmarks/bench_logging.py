@@ -0,0 +1,40 @@
+# Drives one session through up to 1M update() turns and checks log memory stays flat.
+# Run from the "Group assignment" folder: python benchmarks/bench_logging.py [--updates N]
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OopGroup2023 import DEBUG, INFO, LEVEL_NAMES, Game
+
+
+def measure(updates, level):
+    game = Game(audio=False, log_level=level)
+    game.step(("s", "Agent"))
+    checkpoints = {updates // 100, updates // 10, updates}
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    results = []
+    for turn in range(1, updates + 1):
+        game.step(("r",))
+        if turn in checkpoints:
+            results.append((turn, tracemalloc.get_traced_memory()[0] - baseline))
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+    return results, elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--updates", type=int, default=1000000)
+    args = parser.parse_args()
+
+    for level in (INFO, DEBUG):
+        results, elapsed = measure(args.updates, level)
+        for turns, used in results:
+            print(f"{LEVEL_NAMES[level]:>5} {turns:>8} updates: {used / 1024:>8.1f} KiB held")
+        print(f"{LEVEL_NAMES[level]:>5} {args.updates / elapsed:>8.0f} updates/s (traced)")
@@ -0,0 +1,122 @@
+# Matches per second for player input: menu commands, and passphrases from the shipped scenario
+# up to thousands per scenario, each as exact hits, typos and misses. Every answer is checked
+# against a brute-force scan over all phrases first.
+# Run from the "Group assignment" folder: python benchmarks/bench_matcher.py
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OopGroup2023 import TRAIN_MURDER
+from matcher import COMMANDS, Matcher, normalize, tolerance
+
+SYLLABLES = ("an", "bel", "cor", "da", "el", "fen", "gra", "ho", "ir", "jun", "ka", "lor", "mi", "nor",
+             "os", "pa", "quo", "ri", "sa", "tor", "ul", "ve", "wy", "xa", "yr", "zo")
+
+
+def passphrases(count, rng):
+    # Two or three made-up words each, like the scenario's "oscail an doras"
+    phrases = set()
+    while len(phrases) < count:
+        words = ("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3)))
+                 for _ in range(rng.randint(2, 3)))
+        phrases.add(" ".join(words))
+    return sorted(phrases)
+
+
+def typo(phrase, rng):
+    # One swap, drop, doubling or wrong letter, plus random case
+    chars = list(phrase)
+    index = rng.randrange(len(chars) - 1)
+    kind = rng.randrange(4)
+    if kind == 0:
+        chars[index], chars[index + 1] = chars[index + 1], chars[index]
+    elif kind == 1:
+        del chars[index]
+    elif kind == 2:
+        chars.insert(index, chars[index])
+    else:
+        chars[index] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    return "".join(char.upper() if rng.random() < 0.3 else char for char in chars)
+
+
+def distance(a, b):
+    # Optimal string alignment distance, the same measure the trie walk uses
+    previous, row = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, row = previous, row, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            row[j] = min(row[j - 1] + 1, previous[j] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                row[j] = min(row[j], before[j - 2] + 1)
+    return row[-1]
+
+
+def brute_force(phrases, text, max_distance=2):
+    word = normalize(text)
+    found = {}
+    for phrase in phrases:
+        key = normalize(phrase)
+        gap = distance(word, key)
+        if gap <= tolerance(key, max_distance) and key[0] == word[:1]:  # The first character must be right
+            found.setdefault(gap, set()).add(key)
+    if not found:
+        return None
+    closest = found[min(found)]
+    return next(iter(closest)) if len(closest) == 1 else None
+
+
+def inputs(phrases, rng, count=2000):
+    exact = [rng.choice(phrases).upper() for _ in range(count)]
+    typos = [typo(rng.choice(phrases), rng) for _ in range(count)]
+    misses = [" ".join(rng.choice(SYLLABLES) * 3 for _ in range(2)) for _ in range(count)]
+    return {"exact": exact, "typo": typos, "miss": misses}
+
+
+def rate(matcher, texts, repeats=3):
+    best = 0.0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for text in texts:
+            matcher.match(text)
+        best = max(best, len(texts) / (time.perf_counter() - start))
+    return best
+
+
+def check(matcher, phrases, cases, sample=60):
+    for texts in cases.values():
+        for text in texts[:sample]:
+            assert matcher.match(text) == brute_force(phrases, text), text
+
+
+if __name__ == "__main__":
+    rng = random.Random(3)
+    assert COMMANDS.match("EXAMINE") == COMMANDS.match("exmaine") == "e"
+    shipped = [carriage.password for carriage in TRAIN_MURDER.carriages]
+    assert TRAIN_MURDER.passwords.match("Oscial  an DÓRAS") == normalize(shipped[-1])
+    assert TRAIN_MURDER.passwords.match("6968") is None  # Numeric codes stay exact
+
+    cases = {"exact": ["e", "E", "examine", " Review "], "typo": ["exmaine", "reveiw", "examin"],
+             "miss": ["x", "hello", "qiut"]}
+    for kind, texts in cases.items():
+        print(f"{'commands':>18} {kind:>6}: {rate(COMMANDS, texts * 500):>10.0f} matches/s")
+
+    for count in (len(shipped), 500, 5000):
+        phrases = shipped if count == len(shipped) else passphrases(count, rng)
+        start = time.perf_counter()
+        matcher = Matcher(phrases)
+        built = time.perf_counter() - start
+        cases = inputs(phrases, rng)
+        check(matcher, phrases, cases)
+        for kind, texts in cases.items():
+            matched = sum(matcher.match(text) is not None for text in texts) / len(texts)
+            print(f"{count:>8} passphrases {kind:>6}: {rate(matcher, texts):>10.0f} matches/s "
+                  f"({matched:.0%} matched, built in {built * 1000:.1f} ms)")
+        sample = cases["typo"][:20]
+        start = time.perf_counter()
+        for text in sample:
+            brute_force(phrases, text)
+        print(f"{count:>8} passphrases   scan: {len(sample) / (time.perf_counter() - start):>10.0f} matches/s "
+              f"(typos, comparing with every phrase)")
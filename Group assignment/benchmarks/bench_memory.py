@@ -0,0 +1,32 @@
+# Reports bytes per idle session, fresh and part-way through an investigation.
+# Run from the "Group assignment" folder: python benchmarks/bench_memory.py
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OopGroup2023 import Game
+
+MID_GAME = [("s", "Agent"), ("e",), ("c", 1, "6969"), ("i", 2), ("c", 2, "4545")]
+
+
+def bytes_per_session(sessions, commands):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    games = [Game(audio=False) for _ in range(sessions)]
+    for game in games:
+        for command in commands:
+            game.step(command)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / sessions
+
+
+if __name__ == "__main__":
+    sessions = 10000
+    print(f"fresh session:    {bytes_per_session(sessions, []):>8.0f} bytes")
+    print(f"mid-game session: {bytes_per_session(sessions, MID_GAME):>8.0f} bytes")
@@ -0,0 +1,103 @@
+# Cost of command instrumentation relative to the cost of a command. The instrumentation is
+# measured on a game whose engine does nothing, since the difference between two end-to-end
+# runs is far smaller than their run-to-run noise. First checks that the counters stay exact
+# while another thread scrapes them.
+# Run from the "Group assignment" folder: python benchmarks/bench_metrics.py
+import gc
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from OopGroup2023 import ERROR, Game
+from bench_engine import WINNING_PLAYTHROUGH
+from metrics import Metrics
+
+SESSIONS = 2000
+BUDGET = 0.02
+
+
+class IdleGame(Game):
+    # Replaces the engine so that step() measures nothing but its instrumentation
+    __slots__ = ()
+
+    def _Game__step(self, command):
+        return None
+
+
+def timed(calls):
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for call, command in calls:
+            call(command)
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def per_command(mode, game_class=Game):
+    metrics = Metrics() if mode == "enabled" else None
+    games = [game_class(audio=False, log_level=ERROR, metrics=metrics) for _ in range(SESSIONS)]
+    calls = []
+    for command in WINNING_PLAYTHROUGH:
+        for game in games:
+            calls.append((game._Game__step if mode == "bare" else game.step, command))
+    return timed(calls) / len(calls)
+
+
+def best(mode, game_class=Game, rounds=15):
+    return min(per_command(mode, game_class) for _ in range(rounds))
+
+
+def check_exact_counts(threads=4, games=1000):
+    # Games on several threads while a scrape thread folds the counters in a loop. Threads are
+    # switched as often as possible so appends land in the middle of a fold.
+    metrics = Metrics()
+    scraping = True
+
+    def scrape():
+        while scraping:
+            metrics.fold()
+
+    def play():
+        for _ in range(games):
+            game = Game(audio=False, log_level=ERROR, metrics=metrics)
+            for command in WINNING_PLAYTHROUGH:
+                game.step(command)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        scraper = threading.Thread(target=scrape)
+        players = [threading.Thread(target=play) for _ in range(threads)]
+        scraper.start()
+        for player in players:
+            player.start()
+        for player in players:
+            player.join()
+        scraping = False
+        scraper.join()
+    finally:
+        sys.setswitchinterval(interval)
+    metrics.fold()
+    assert sum(metrics.counts.values()) == threads * games * len(WINNING_PLAYTHROUGH)
+
+
+if __name__ == "__main__":
+    check_exact_counts()
+    print("counters: exact while another thread scrapes them")
+    command = best("bare")
+    idle = {mode: best(mode, IdleGame) for mode in ("bare", "disabled", "enabled")}
+    disabled = idle["disabled"] - idle["bare"]
+    enabled = idle["enabled"] - idle["disabled"]
+    print(f"command cost:                 {command * 1e6:7.3f} us")
+    print(f"step() wrapper, metrics off:  {disabled * 1e9:7.1f} ns ({disabled / command:.2%} of a command)")
+    print(f"instrumentation, metrics on:  {enabled * 1e9:7.1f} ns ({enabled / command:.2%} of a command)")
+
+    overhead = enabled / command
+    print(f"Instrumentation overhead: {overhead:.2%} (budget {BUDGET:.0%})")
+    sys.exit(0 if overhead < BUDGET else 1)
@@ -0,0 +1,31 @@
+# Monte Carlo throughput for 1, 2, 4, ... worker processes up to the number of cores.
+# Run from the "Group assignment" folder: python benchmarks/bench_playtest.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playtest import simulate
+
+
+def worker_counts(cores):
+    count = 1
+    while count < cores:
+        yield count
+        count *= 2
+    yield cores
+
+
+if __name__ == "__main__":
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    cores = os.cpu_count() or 1
+    baseline = None
+    print(f"{'workers':>7} {'games/s':>10} {'speedup':>8} {'efficiency':>10} {'win rate':>9}")
+    for workers in worker_counts(cores):
+        start = time.perf_counter()
+        tally = simulate(games, workers)
+        rate = tally.games / (time.perf_counter() - start)
+        baseline = baseline or rate
+        print(f"{workers:>7} {rate:>10.0f} {rate / baseline:>8.2f} {rate / baseline / workers:>10.0%} "
+              f"{tally.win_rate():>9.2%}")
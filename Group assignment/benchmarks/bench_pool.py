@@ -0,0 +1,69 @@
+# New games per second with a fresh Game() per investigation against games recycled by a
+# SessionPool, plus a check that a recycled game starts exactly like a fresh one.
+# Run from the "Group assignment" folder: python benchmarks/bench_pool.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from OopGroup2023 import Game
+from bench_engine import WINNING_PLAYTHROUGH
+from pool import SessionPool
+
+ABANDONED = [("s", "Agent"), ("e",), ("c", 2)]  # Left waiting for a password
+
+
+def state(game):
+    return (game.flags, game.clues, game.outcome, game.running, game.prompt, game.round_duration,
+            game.player_stats.clues_found, game.player_stats.decisions_made, game.get_logs(),
+            game.get_error_logs())
+
+
+def check_reset():
+    pool = SessionPool()
+    for commands in (WINNING_PLAYTHROUGH, ABANDONED, [("a", 2)]):
+        game = pool.acquire()
+        game.begin()
+        for command in commands:
+            game.step(command)
+        pool.release(game)
+        recycled = pool.acquire()
+        assert recycled is game
+        fresh = Game(audio=False)
+        assert state(recycled) == state(fresh), "a recycled game differs from a fresh one"
+        results = [(recycled.begin(), fresh.begin())]
+        results += [(recycled.step(command), fresh.step(command)) for command in WINNING_PLAYTHROUGH]
+        for ours, theirs in results:
+            assert ours.lines[1:] == theirs.lines[1:] and ours.clues == theirs.clues  # lines[0] is the time left
+        assert state(recycled)[:-2] == state(fresh)[:-2]
+        pool.release(recycled)
+        pool.release(fresh)
+
+
+def games_per_second(count, commands, pool=None):
+    start = time.perf_counter()
+    for _ in range(count):
+        game = Game(audio=False) if pool is None else pool.acquire()
+        game.begin()
+        for command in commands:
+            game.step(command)
+        if pool is not None:
+            pool.release(game)
+        else:
+            game.expire()  # Release its deadline like the server does for a session that ends early
+    return count / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    check_reset()
+    count = 50000
+    pool = SessionPool(capacity=64)
+    for name, commands in (("start only", []), ("abandoned", ABANDONED), ("full game", WINNING_PLAYTHROUGH)):
+        fresh = pooled = 0.0
+        for _ in range(3):  # Alternated, so drift on a busy machine hits both alike
+            fresh = max(fresh, games_per_second(count, commands))
+            pooled = max(pooled, games_per_second(count, commands, pool))
+        print(f"{name:<11} fresh: {fresh:>8.0f} games/s  pooled: {pooled:>8.0f} games/s  ({pooled / fresh:.2f}x)")
+    print(f"pool: {pool.stats()}")
@@ -0,0 +1,80 @@
+# Write syscalls and bytes per turn for the console output, one print() per line against one
+# buffered frame per turn. The stream is line buffered like stdout on a terminal.
+# Run from the "Group assignment" folder: python benchmarks/bench_render.py
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from OopGroup2023 import Game
+from bench_engine import WINNING_PLAYTHROUGH
+from render import Terminal
+
+
+class CountingRaw(io.RawIOBase):
+    # Stands in for the terminal's file descriptor, every call here would be one write(2)
+    def __init__(self):
+        self.calls = 0
+        self.bytes = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.calls += 1
+        self.bytes += len(data)
+        return len(data)
+
+
+def terminal_stream():
+    raw = CountingRaw()
+    return raw, io.TextIOWrapper(io.BufferedWriter(raw), encoding="utf-8", line_buffering=True)
+
+
+def turns():
+    game = Game(audio=False)
+    return [game.step(command) for command in WINNING_PLAYTHROUGH]
+
+
+def print_per_line(stream):
+    def render(results):
+        for result in results:
+            for line in result.lines:
+                print(line, file=stream)
+            if result.prompt is not None:
+                stream.write(result.prompt)  # What input(prompt) does
+                stream.flush()
+    return render
+
+
+def frame_per_turn(color):
+    def make(stream):
+        terminal = Terminal(stream, color)
+
+        def render(results):
+            for result in results:
+                terminal.write(result.lines, result.prompt)
+        return render
+    return make
+
+
+def measure(name, make_render, repeats=2000):
+    results = turns()
+    raw, stream = terminal_stream()
+    render = make_render(stream)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        render(results)
+    elapsed = time.perf_counter() - start
+    count = repeats * len(results)
+    print(f"{name:>22} {raw.calls / count:>10.2f} {raw.bytes / count:>10.0f} {elapsed / count * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    print(f"{'':>22} {'writes':>10} {'bytes':>10} {'us':>10}   (per turn)")
+    measure("print() per line", print_per_line)
+    measure("frame, colour", frame_per_turn(True))
+    measure("frame, no colour", frame_per_turn(False))
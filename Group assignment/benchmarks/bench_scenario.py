@@ -0,0 +1,31 @@
+# Parse-and-compile cost of scenario files, from the shipped Train Murder up to very large trains.
+# Run from the "Group assignment" folder: python benchmarks/bench_scenario.py
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from OopGroup2023 import CHARACTER_KINDS
+from scenario import SCENARIO_DIR, compile_scenario, load_scenario
+from synthetic import synthetic_scenario
+
+
+def timed(function, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = function()
+    return result, (time.perf_counter() - start) / repeats
+
+
+if __name__ == "__main__":
+    path = os.path.join(SCENARIO_DIR, "train_murder.json")
+    scenario, seconds = timed(lambda: load_scenario(path, CHARACTER_KINDS), 200)
+    print(f"{'train_murder':>22}: {seconds * 1000:8.3f} ms  ({len(scenario.actions)} actions, {len(scenario.clues)} clues)")
+
+    for carriages, characters in ((100, 50), (1000, 500), (10000, 2000)):
+        text = json.dumps(synthetic_scenario(carriages, characters))
+        scenario, seconds = timed(lambda: compile_scenario(json.loads(text), CHARACTER_KINDS), 3)
+        print(f"{scenario.id:>22}: {seconds * 1000:8.3f} ms  ({len(scenario.actions)} actions, {len(scenario.clues)} clues)")
@@ -0,0 +1,119 @@
+# Sessions sharded over worker processes with their state in a shared SQLite file: how evenly
+# the hash ring spreads sessions and how few move on a rebalance, a check that sessions moved
+# between workers mid-game finish exactly like unsharded ones, that bad commands and dead workers
+# do not take the cluster down, and commands per second by worker count. Scaling needs as many free cores as workers.
+# Run from the "Group assignment" folder: python benchmarks/bench_shard.py
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from OopGroup2023 import Game
+from bench_engine import WINNING_PLAYTHROUGH
+from shard import ERROR_OUTCOME, HashRing, ShardCluster, SqliteStore
+
+
+def ring_balance(keys=100000):
+    sessions = [f"session-{number}" for number in range(keys)]
+    ring = HashRing([f"worker-{number}" for number in range(4)])
+    before = {session: ring.node_for(session) for session in sessions}
+    load = Counter(before.values())
+    ring.add("worker-4")
+    moved_on_add = sum(ring.node_for(session) != before[session] for session in sessions)
+    assert all(ring.node_for(session) in (before[session], "worker-4") for session in sessions)
+    after_add = {session: ring.node_for(session) for session in sessions}
+    ring.remove("worker-1")
+    moved_on_remove = sum(ring.node_for(session) != after_add[session] for session in sessions)
+    assert moved_on_remove == sum(owner == "worker-1" for owner in after_add.values())
+    return max(load.values()) / min(load.values()), moved_on_add / keys, moved_on_remove / keys
+
+
+def play(cluster, sessions, prefix, on_round=None):
+    ids = [f"{prefix}-{number}" for number in range(sessions)]
+    start = time.perf_counter()
+    cluster.submit([(session, None) for session in ids])
+    for index, command in enumerate(WINNING_PLAYTHROUGH):
+        if on_round is not None:
+            on_round(index)
+        replies = cluster.submit([(session, command) for session in ids])
+    elapsed = time.perf_counter() - start
+    return ids, replies, sessions * (len(WINNING_PLAYTHROUGH) + 1) / elapsed
+
+
+def check_resume(path, sessions=600):
+    # Workers join and leave mid-game; every session must still end like an unsharded game
+    cluster = ShardCluster(path, workers=2)
+
+    def rebalance(index):
+        if index == 3:
+            cluster.add_worker()
+        elif index == 5:
+            cluster.remove_worker("worker-0")
+
+    ids, replies, _ = play(cluster, sessions, "resume", rebalance)
+    loaded = cluster.close()
+    assert all(outcome == "won" for _, _, _, outcome in replies)
+    reference = Game(audio=False)
+    for command in WINNING_PLAYTHROUGH:
+        reference.step(command)
+    store = SqliteStore(path)
+    for session in ids:
+        game = Game.restore(store.get(session))
+        assert (game.flags, game.clues, game.outcome, game.player_stats.clues_found,
+                game.player_stats.decisions_made) == (reference.flags, reference.clues, reference.outcome,
+                                                      reference.player_stats.clues_found,
+                                                      reference.player_stats.decisions_made)
+    store.close()
+    return loaded
+
+
+def check_failures(path, sessions=40):
+    # An unknown or already started session gets an error reply and its worker stays up; a
+    # worker killed between batches fails its share once and is replaced, and its sessions
+    # carry on from the store
+    cluster = ShardCluster(path, workers=2)
+    ids = [f"failure-{number}" for number in range(sessions)]
+    cluster.submit([(session, None) for session in ids])
+    replies = cluster.submit([("missing", ("s",))] + [(session, ("s",)) for session in ids])
+    assert [session for session, _, _, outcome in replies if outcome == ERROR_OUTCOME] == ["missing"]
+    replies = cluster.submit([(ids[0], None)])  # Started twice: refused, the live game carries on
+    assert replies[0][3] == ERROR_OUTCOME
+
+    victim = next(process for process in multiprocessing.active_children() if process.name == "worker-0")
+    victim.kill()
+    victim.join()
+    replies = cluster.submit([(session, ("Agent",)) for session in ids])
+    failed = {session for session, _, _, outcome in replies if outcome == ERROR_OUTCOME}
+    assert failed and failed == {session for session in ids if cluster.ring.node_for(session) == "worker-0"}
+    for session in failed:  # Lost with the worker, so given again
+        cluster.submit([(session, ("Agent",))])
+    for command in WINNING_PLAYTHROUGH[1:]:
+        replies = cluster.submit([(session, command) for session in ids])
+    cluster.close()
+    assert all(outcome == "won" for _, _, _, outcome in replies)
+    return len(failed)
+
+
+if __name__ == "__main__":
+    imbalance, moved_on_add, moved_on_remove = ring_balance()
+    print(f"ring: busiest/idlest worker {imbalance:.2f}, adding a 5th worker moved {moved_on_add:.1%} "
+          f"of sessions, removing one moved {moved_on_remove:.1%}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        loaded = check_resume(os.path.join(directory, "resume.db"))
+        print(f"resume: every session won after rebalancing mid-game, {loaded} resumed from the store")
+        failed = check_failures(os.path.join(directory, "failures.db"))
+        print(f"failures: an unknown session, a repeated start and a killed worker ({failed} commands lost) "
+              f"left the cluster serving, every session won")
+
+        print(f"cores: {os.cpu_count()}")
+        for workers in (1, 2, 4):
+            cluster = ShardCluster(os.path.join(directory, f"load-{workers}.db"), workers=workers)
+            _, _, rate = play(cluster, 4000, "load")
+            cluster.close()
+            print(f"{workers} worker(s): {rate:>8.0f} commands/s")
@@ -0,0 +1,64 @@
+# Checkpoints a session after every command of a winning playthrough and restores each checkpoint,
+# then round-trips a session on a train with more flags and clues than a 16-bit count can hold.
+# Run from the "Group assignment" folder: python benchmarks/bench_snapshot.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from OopGroup2023 import CHARACTER_KINDS, ERROR, Game
+from scenario import compile_scenario
+from synthetic import synthetic_scenario
+
+WINNING_PLAYTHROUGH = [("s", "Agent"), ("e",), ("c", 1, "6969"), ("i", 2), ("c", 2, "4545"),
+                       ("c", 3, "oscail an doras"), ("r",), ("a", 1)]
+REPEATS = 2000
+
+
+def checkpoints():
+    game = Game(audio=False)
+    game.begin()
+    snapshots = []
+    for command in WINNING_PLAYTHROUGH:
+        game.step(command)
+        snapshots.append(game.snapshot())
+    return game, snapshots
+
+
+def large_round_trip(carriages=2100, characters=1000, clues_per_group=700):
+    # Every group and carriage visited; the round is not started, so the snapshot holds no clock
+    scenario = compile_scenario(synthetic_scenario(carriages, characters, clues_per_group), CHARACTER_KINDS)
+    game = Game(audio=False, log_level=ERROR, scenario=scenario)
+    game.step(("s", "Agent"))
+    for number in scenario.groups:
+        game.step(("i", number))
+    for carriage in scenario.carriages:
+        game.step(("c", carriage.number, carriage.password))
+    data = game.snapshot()
+    restored = Game.restore(data, scenario=scenario)
+    assert restored.snapshot() == data
+    return scenario.flag_count, len(restored.clues), len(data)
+
+
+if __name__ == "__main__":
+    game, snapshots = checkpoints()
+
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        game.snapshot()
+    snapshot_us = (time.perf_counter() - start) / REPEATS * 1e6
+
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        Game.restore(snapshots[-2])
+    restore_us = (time.perf_counter() - start) / REPEATS * 1e6
+
+    sizes = [len(data) for data in snapshots]
+    print(f"snapshot: {snapshot_us:.2f} us")
+    print(f"restore:  {restore_us:.2f} us")
+    print(f"size:     {min(sizes)}-{max(sizes)} bytes across the playthrough")
+
+    flag_count, clue_count, size = large_round_trip()
+    print(f"large:    {flag_count} flags, {clue_count} clues restored exactly from {size} bytes")
@@ -0,0 +1,27 @@
+# States explored per second by the exhaustive solver, on the Train Murder and on long synthetic trains.
+# Run from the "Group assignment" folder: python benchmarks/bench_solver.py
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from OopGroup2023 import CHARACTER_KINDS
+from scenario import compile_scenario
+from solver import Solver
+from synthetic import synthetic_scenario
+
+
+def report(name, solver):
+    result = solver.solve()
+    print(f"{name:>26}: {result.explored_states:>7} states {result.transitions:>8} transitions "
+          f"{result.seconds * 1000:>9.1f} ms {result.states_per_second():>9.0f} states/s "
+          f"(win in {len(result.shortest_complete_win)} commands, {len(result.dead_ends)} dead ends)")
+
+
+if __name__ == "__main__":
+    report("train_murder", Solver())
+    report("train_murder (guessing)", Solver(fair=False))
+    for carriages, characters in ((100, 50), (300, 200), (1000, 500)):
+        scenario = compile_scenario(synthetic_scenario(carriages, characters), CHARACTER_KINDS)
+        report(scenario.id, Solver(scenario))
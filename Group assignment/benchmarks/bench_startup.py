@@ -0,0 +1,38 @@
+# Import-time and construction budget for headless games. Exits with status 1 if a budget is blown.
+# Run from the "Group assignment" folder: python benchmarks/bench_startup.py
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_BUDGET_MS = 50
+CONSTRUCTION_BUDGET_US = 200
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+from OopGroup2023 import Game
+import_ms = (time.perf_counter() - start) * 1000
+start = time.perf_counter()
+for _ in range(10000):
+    Game(audio=False)
+construct_us = (time.perf_counter() - start) / 10000 * 1e6
+print(import_ms, construct_us, "pygame" in sys.modules)
+"""
+
+
+def measure():
+    # A fresh interpreter so nothing is already imported
+    output = subprocess.run([sys.executable, "-c", PROBE], cwd=HERE, capture_output=True, text=True, check=True)
+    import_ms, construct_us, pygame_loaded = output.stdout.split()
+    return float(import_ms), float(construct_us), pygame_loaded == "True"
+
+
+if __name__ == "__main__":
+    import_ms, construct_us, pygame_loaded = measure()
+    print(f"import OopGroup2023: {import_ms:.2f} ms (budget {IMPORT_BUDGET_MS} ms)")
+    print(f"Game(audio=False):   {construct_us:.2f} us (budget {CONSTRUCTION_BUDGET_US} us)")
+    print(f"pygame loaded:       {pygame_loaded}")
+    if import_ms > IMPORT_BUDGET_MS or construct_us > CONSTRUCTION_BUDGET_US or pygame_loaded:
+        sys.exit(1)
@@ -0,0 +1,30 @@
+# Registers 1 to 10,000 round deadlines and checks the timer cost stays flat.
+# Run from the "Group assignment" folder: python benchmarks/bench_timer.py
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import scheduler
+
+
+def measure(sessions, window=1.0):
+    deadlines = [scheduler.schedule(300) for _ in range(sessions)]
+    wakeups_before = scheduler.wakeups
+    cpu_before = time.process_time()
+    time.sleep(window)
+    cpu = time.process_time() - cpu_before
+    threads = threading.active_count()
+    for deadline in deadlines:
+        deadline.cancel()
+    return {"sessions": sessions, "threads": threads, "cpu_ms": cpu * 1000,
+            "wakeups": scheduler.wakeups - wakeups_before}
+
+
+if __name__ == "__main__":
+    print(f"{'sessions':>8} {'threads':>8} {'cpu ms/s':>9} {'wakeups':>8}")
+    for n in (1, 10, 100, 1000, 10000):
+        result = measure(n)
+        print(f"{result['sessions']:>8} {result['threads']:>8} {result['cpu_ms']:>9.2f} {result['wakeups']:>8}")
@@ -0,0 +1,87 @@
+# Opens thousands of concurrent sessions against server.py and reports command latency.
+# Run from the "Group assignment" folder: python benchmarks/loadgen.py
+# A framed server is started automatically unless --no-spawn is given.
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server import FRAME_END
+
+SCRIPT = ["", "s", "Agent", "e", "c", "1", "6969", "i", "2", "c", "2", "4545", "c", "3", "oscail an doras", "r", "a", "1"]
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def play(host, port, latencies, started):
+    reader, writer = await asyncio.open_connection(host, port)
+    await started.wait()  # Every client connects before anyone starts playing
+    try:
+        await reader.readuntil(FRAME_END.encode())  # Intro and first prompt
+        for line in SCRIPT[1:]:
+            sent = time.perf_counter()
+            writer.write(line.encode() + b"\n")
+            try:
+                await reader.readuntil(FRAME_END.encode())
+            except asyncio.IncompleteReadError:
+                latencies.append(time.perf_counter() - sent)  # The final arrest closes the session
+                break
+            latencies.append(time.perf_counter() - sent)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, sessions):
+    latencies = []
+    started = asyncio.Event()
+    clients = [asyncio.create_task(play(host, port, latencies, started)) for _ in range(sessions)]
+    await asyncio.sleep(0.5)
+    start = time.perf_counter()
+    started.set()
+    results = await asyncio.gather(*clients, return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    errors = sum(1 for result in results if isinstance(result, Exception))
+    return latencies, elapsed, errors
+
+
+def raise_file_limit(sessions):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = min(hard, max(soft, sessions * 2 + 64))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+
+
+def start_server(port):
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    server = subprocess.Popen([sys.executable, os.path.join(here, "server.py"), "--port", str(port), "--framed"],
+                              cwd=here)
+    time.sleep(1)
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the session server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8123)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1000, 5000, 10000])
+    parser.add_argument("--no-spawn", action="store_true", help="use an already running framed server")
+    args = parser.parse_args()
+
+    raise_file_limit(max(args.sessions))
+    server = None if args.no_spawn else start_server(args.port)
+    try:
+        print(f"{'sessions':>8} {'commands':>9} {'cmd/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for n in args.sessions:
+            latencies, elapsed, errors = asyncio.run(run_load(args.host, args.port, n))
+            print(f"{n:>8} {len(latencies):>9} {len(latencies) / elapsed:>8.0f} "
+                  f"{percentile(latencies, 0.50) * 1000:>8.2f} {percentile(latencies, 0.99) * 1000:>8.2f} {errors:>7}")
+    finally:
+        if server is not None:
+            server.terminate()
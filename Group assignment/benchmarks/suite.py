@@ -0,0 +1,230 @@
+# Runs the engine benchmarks headlessly, writes the results as JSON and compares them against a
+# stored baseline. Nothing needs a sound card or a display: input() is scripted and pygame is
+# replaced by a silent stand-in, so the real audio backend code still runs.
+# Run from the "Group assignment" folder:
+#   python benchmarks/suite.py                    compare against benchmarks/baseline.json
+#   python benchmarks/suite.py --save-baseline    record this machine's numbers as the baseline
+# Every benchmark runs --runs times and its median is kept, so one slow run on a busy machine
+# does not count as a regression. Exits with status 1 when a result is worse than its baseline
+# by more than its tolerance.
+import argparse
+import builtins
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import types
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from OopGroup2023 import DEBUG, ERROR, INFO, Game
+from bench_engine import WINNING_PLAYTHROUGH
+from render import Terminal
+
+import bench_logging
+import bench_memory
+import bench_startup
+import bench_timer
+
+BASELINE = os.path.join(HERE, "baseline.json")
+RESULTS = os.path.join(HERE, "latest.json")
+
+# Console input for a full winning game, starting with Enter on the title screen
+CONSOLE_SCRIPT = ["", "s", "Agent", "e", "c", "1", "6969", "i", "2", "c", "2", "4545", "c", "3",
+                  "oscail an doras", "r", "a", "1"]
+
+# One command per branch of update(), each sent to a game waiting at the main menu
+BRANCHES = {"quit": ("q",), "arrest": ("a", 1), "interact": ("i", 2), "examine": ("e",),
+            "carriage": ("c", 1, "6969"), "review": ("r",), "invalid": ("x",)}
+
+
+def install_silent_pygame():
+    # Just enough of pygame for PygameAudioBackend: every sound is decoded instantly and lasts 0 s
+    if "pygame" in sys.modules:
+        return
+
+    class Sound:
+        def __init__(self, path):
+            self.path = path
+
+        def get_length(self):
+            return 0.0
+
+        def play(self, loops=0):
+            return None
+
+    music = types.SimpleNamespace(load=lambda path: None, play=lambda loops=0: None, stop=lambda: None)
+    mixer = types.SimpleNamespace(init=lambda: None, get_init=lambda: (44100, -16, 2), Sound=Sound, music=music)
+    pygame = types.ModuleType("pygame")
+    pygame.error = type("error", (RuntimeError,), {})
+    pygame.mixer = mixer
+    sys.modules["pygame"] = pygame
+
+
+def best_of(rounds, measure):
+    return min(measure() for _ in range(rounds))
+
+
+def construction_us(audio, count=20000):
+    def measure():
+        start = time.perf_counter()
+        for _ in range(count):
+            Game(audio=audio, log_level=INFO)
+        return (time.perf_counter() - start) / count * 1e6
+    return best_of(5, measure)
+
+
+def playthrough_us(sessions=2000):
+    def measure():
+        games = [Game(audio=False) for _ in range(sessions)]
+        start = time.perf_counter()
+        for game in games:
+            for command in WINNING_PLAYTHROUGH:
+                game.step(command)
+        elapsed = time.perf_counter() - start
+        assert all(game.outcome == "won" for game in games)
+        return elapsed / sessions * 1e6
+    return best_of(5, measure)
+
+
+def console_playthrough_us(games=200):
+    # The console adapter end to end: title screen, run() and the audio backend, with input() scripted
+    def measure():
+        real_input = builtins.input
+        total = 0.0
+        try:
+            for _ in range(games):
+                answers = iter(CONSOLE_SCRIPT)
+                builtins.input = lambda prompt="": next(answers)
+                game = Game(audio=True)
+                game.terminal = Terminal(io.StringIO(), color=True)
+                start = time.perf_counter()
+                game.title_screen()
+                game.run()
+                total += time.perf_counter() - start
+                game.wait_for_sound()
+                game.stop_background_sound()
+                assert game.outcome == "won"
+        finally:
+            builtins.input = real_input
+        return total / games * 1e6
+    return best_of(3, measure)
+
+
+def branch_latency_us(command, sessions=2000):
+    def measure():
+        games = [Game(audio=False) for _ in range(sessions)]
+        for game in games:
+            game.step(("s", "Agent"))
+        start = time.perf_counter()
+        for game in games:
+            game.step(command)
+        return (time.perf_counter() - start) / sessions * 1e6
+    return best_of(5, measure)
+
+
+def log_growth_kib(level, updates=100000):
+    results, _ = bench_logging.measure(updates, level)
+    return results[-1][1] / 1024
+
+
+def collect():
+    # name -> (value, unit, relative tolerance, absolute slack). Timings of a few microseconds
+    # swing by a third between runs even as medians, so they get a wider tolerance than the
+    # longer playthroughs.
+    results = {}
+    import_ms, _, pygame_loaded = bench_startup.measure()
+    results["import_ms"] = (import_ms, "ms", 0.5, 5.0)
+    results["pygame_loaded_headless"] = (int(pygame_loaded), "bool", 0.0, 0.0)
+
+    install_silent_pygame()
+    results["construct_headless_us"] = (construction_us(False), "us", 0.5, 0.5)
+    results["construct_audio_us"] = (construction_us(True), "us", 0.5, 0.5)
+    results["playthrough_headless_us"] = (playthrough_us(), "us", 0.3, 5.0)
+    results["playthrough_console_us"] = (console_playthrough_us(), "us", 0.3, 20.0)
+    for branch, command in BRANCHES.items():
+        results[f"command_{branch}_us"] = (branch_latency_us(command), "us", 0.5, 1.0)
+
+    results["memory_fresh_session_bytes"] = (bench_memory.bytes_per_session(5000, []), "bytes", 0.1, 64)
+    results["memory_mid_game_session_bytes"] = (bench_memory.bytes_per_session(5000, bench_memory.MID_GAME),
+                                                "bytes", 0.1, 64)
+    for level, name in ((INFO, "info"), (DEBUG, "debug"), (ERROR, "error")):
+        results[f"log_held_after_100k_updates_{name}_kib"] = (log_growth_kib(level), "KiB", 0.1, 8.0)
+
+    timer = bench_timer.measure(1000, window=1.0)
+    results["timer_cpu_ms_per_s_1000_sessions"] = (timer["cpu_ms"], "ms", 1.0, 5.0)
+    results["timer_wakeups_per_s_1000_sessions"] = (timer["wakeups"], "count", 0.0, 2.0)
+    results["timer_threads_1000_sessions"] = (timer["threads"], "count", 0.0, 1.0)
+    return results
+
+
+def collect_median(runs):
+    # Each value is the median of `runs` complete passes over the benchmarks
+    passes = [collect() for _ in range(runs)]
+    return {name: (statistics.median(results[name][0] for results in passes),) + entry[1:]
+            for name, entry in passes[0].items()}
+
+
+def to_json(results, runs=1):
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "recorded": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "runs": runs,
+        "results": {name: {"value": round(value, 4), "unit": unit, "tolerance": tolerance, "slack": slack}
+                    for name, (value, unit, tolerance, slack) in results.items()},
+    }
+
+
+def compare(current, baseline):
+    # Lower is better for everything measured here
+    regressions = []
+    print(f"{'benchmark':<42} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, entry in current["results"].items():
+        value = entry["value"]
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<42} {'-':>12} {value:>12.3f} {'new':>8}")
+            continue
+        limit = base["value"] * (1 + entry["tolerance"]) + entry["slack"]
+        change = (value - base["value"]) / base["value"] if base["value"] else 0.0
+        flag = "  REGRESSION" if value > limit else ""
+        print(f"{name:<42} {base['value']:>12.3f} {value:>12.3f} {change:>+8.1%}{flag}")
+        if value > limit:
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the engine benchmarks and compare against a baseline.")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--output", default=RESULTS, help="where to write this run's results")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--runs", type=int, default=5, help="passes over the benchmarks, the median is kept")
+    args = parser.parse_args()
+
+    current = to_json(collect_median(args.runs), args.runs)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(current, file, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(current, file, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save-baseline first.")
+        sys.exit(0)
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    regressions = compare(current, baseline)
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+    print("No regressions.")
@@ -0,0 +1,54 @@
+# Builds large scenario dictionaries for the benchmarks, in the same shape as scenarios/*.json.
+# Carriage n's password is revealed by a clue found behind carriage n - 1, so the whole train
+# is a chain that starts at the crime scene.
+
+
+def synthetic_scenario(carriages=100, characters=50, clues_per_group=5):
+    cast = {}
+    for i in range(characters):
+        kind = "suspect" if i == 0 else "witness" if i % 7 == 1 else "npc"
+        spec = {"kind": kind, "name": f"Delegate {i}", "dialogue": f"I was in carriage {i % carriages + 1}."}
+        if kind != "npc":
+            spec["statement"] = f"Seen near the dining car at {i} o'clock."
+            spec["evidence"] = True
+        cast[f"c{i}"] = spec
+
+    keys = list(cast)
+    groups = []
+    for start in range(0, characters, 10):
+        groups.append({
+            "intro": f"You speak to delegates {start} to {start + 9}.",
+            "speakers": keys[start:start + 10],
+            "clues": [f"Rumour {start}-{j} about the {j}th delegation" for j in range(clues_per_group)],
+            "repeat": "They have nothing more to say.",
+        })
+
+    train = []
+    for n in range(1, carriages + 1):
+        train.append({
+            "label": f"{{green}}Carriage {n}{{reset}}",
+            "approach": [f"You approach the door to carriage {n}."],
+            "prompt": "Enter the passcode : ",
+            "password": f"code{n}",
+            "success": ["The door opens."],
+            "clue": f"Carriage {n + 1} passcode : code{n + 1}",
+            "failure": "Incorrect password. You return to the main menu.",
+            "visited": f"You have looked in Carriage {n} already.",
+        })
+
+    return {
+        "format": 1,
+        "id": f"synthetic_{carriages}_{characters}",
+        "title": "Synthetic Train",
+        "round_duration": 300,
+        "location": "Dining car",
+        "welcome": ["Welcome to the synthetic train."],
+        "story": ["Good luck, Agent {player_name}."],
+        "characters": cast,
+        "interact": {"intro": "You look around.", "prompt": "Choose a group: ", "groups": groups},
+        "examine": {"intro": "You examine the scene.", "lines": ["A note is pinned to the wall."],
+                    "clues": ["Carriage 1 passcode : code1"], "repeat": "Nothing new here."},
+        "carriages": train,
+        "arrest": {"lineup": keys, "culprit": keys[0], "confession": "{name}: It was me.",
+                   "denial": "{name}: Not me.", "win": ["You win."], "lose": ["You lose."]},
+    }
@@ -0,0 +1,178 @@
+import json
+import mmap
+import os
+import struct
+import zlib
+
+# Read-only string tables for scenario text. A bundle is one file: a header, a hash table of
+# fixed-size slots, then every id and text as UTF-8. Readers mmap the file, so all the processes
+# that open a bundle share one copy of it in the page cache, and a lookup decodes only the
+# string asked for.
+#
+#   header  "<4sBxxxII"  magic, version, number of texts, number of slots (a power of two)
+#   slot    "<IQHI"      CRC-32 of the id, file offset of the id (its text follows it), id and
+#                        text lengths. Ids start at slot crc & (slots - 1) and probe linearly;
+#                        an id length of 0 marks an empty slot.
+#
+# Ids are the dotted paths of the texts in the scenario file ("carriages.0.success"), and
+# "clues.<n>" for the scenario's clue table. A localised text is stored under "<locale>/<id>"
+# next to the original.
+
+BUNDLE_MAGIC = b"TMAB"
+BUNDLE_VERSION = 1
+BUNDLE_HEADER = struct.Struct("<4sBxxxII")
+BUNDLE_SLOT = struct.Struct("<IQHI")
+BUNDLE_SUFFIX = ".bundle"
+LINE_END = "\x1e"  # Ends each line of a text shown as several lines
+
+_SLOTS = BUNDLE_HEADER.size
+_SLOT_SIZE = BUNDLE_SLOT.size
+
+
+def write_bundle(path, texts):
+    # texts maps ids to strings, or to tuples of lines to be read back with lines()
+    slots = 1 << max(3, (2 * len(texts) - 1).bit_length())  # At most half full
+    mask = slots - 1
+    table = [None] * slots
+    offset = BUNDLE_HEADER.size + BUNDLE_SLOT.size * slots
+    data = []
+    for key, text in texts.items():
+        if not isinstance(text, str):
+            text = "".join(line + LINE_END for line in text)
+        encoded_key = key.encode("utf-8")
+        encoded = text.encode("utf-8")
+        if not encoded_key:
+            raise ValueError("Text ids must not be empty.")
+        crc = zlib.crc32(encoded_key)
+        slot = crc & mask
+        while table[slot] is not None:
+            slot = (slot + 1) & mask
+        table[slot] = BUNDLE_SLOT.pack(crc, offset, len(encoded_key), len(encoded))
+        data += (encoded_key, encoded)
+        offset += len(encoded_key) + len(encoded)
+    empty = BUNDLE_SLOT.pack(0, 0, 0, 0)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        file.write(BUNDLE_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(texts), slots))
+        file.write(b"".join(empty if entry is None else entry for entry in table))
+        file.write(b"".join(data))
+    os.replace(temporary, path)  # Processes that still map the old file keep reading it
+    return len(texts)
+
+
+class AssetBundle:
+    # A bundle opened read-only. With a locale, texts translated into it are returned in place
+    # of the originals.
+    __slots__ = ("path", "locale", "__file", "__map", "__count", "__mask")
+
+    def __init__(self, path, locale=None):
+        self.path = path
+        self.locale = locale
+        self.__map = None
+        self.__file = open(path, "rb")
+        try:
+            if os.fstat(self.__file.fileno()).st_size < BUNDLE_HEADER.size:
+                raise ValueError(f"{path} is not an asset bundle.")
+            self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, self.__count, slots = BUNDLE_HEADER.unpack_from(self.__map)
+            self.__mask = slots - 1
+            if magic != BUNDLE_MAGIC:
+                raise ValueError(f"{path} is not an asset bundle.")
+            if version != BUNDLE_VERSION:
+                raise ValueError(f"Unsupported asset bundle version: {version}")
+        except BaseException:
+            self.close()
+            raise
+
+    def __repr__(self):
+        return f"AssetBundle({self.path!r}, locale={self.locale!r})"
+
+    def __len__(self):
+        return self.__count
+
+    def __contains__(self, key):
+        # Nothing is decoded, scenarios check every id they need when they load
+        if self.locale is not None and self.__slot(f"{self.locale}/{key}") is not None:
+            return True
+        return self.__slot(key) is not None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __slot(self, key):
+        # (offset, id length, text length) of the id's slot, None when the bundle lacks it
+        encoded = key.encode("utf-8")
+        crc = zlib.crc32(encoded)
+        data = self.__map
+        mask = self.__mask
+        slot = crc & mask
+        while True:
+            slot_crc, offset, key_length, text_length = BUNDLE_SLOT.unpack_from(data, _SLOTS + slot * _SLOT_SIZE)
+            if not key_length:
+                return None
+            if slot_crc == crc and data[offset:offset + key_length] == encoded:
+                return offset, key_length, text_length
+            slot = (slot + 1) & mask
+
+    def __find(self, key):
+        found = self.__slot(key)
+        if found is None:
+            return None
+        offset, key_length, text_length = found
+        start = offset + key_length
+        return str(self.__map[start:start + text_length], "utf-8")
+
+    def get(self, key, default=None):
+        if self.locale is not None:
+            text = self.__find(f"{self.locale}/{key}")
+            if text is not None:
+                return text
+        text = self.__find(key)
+        return default if text is None else text
+
+    def text(self, key):
+        text = self.get(key)
+        if text is None:
+            raise KeyError(key)
+        return text
+
+    def lines(self, key):
+        return tuple(self.text(key).split(LINE_END)[:-1])
+
+    def ids(self):
+        # Every id in table order, translations included
+        data = self.__map
+        for slot in range(self.__mask + 1):
+            _, offset, key_length, _ = BUNDLE_SLOT.unpack_from(data, _SLOTS + slot * _SLOT_SIZE)
+            if key_length:
+                yield str(data[offset:offset + key_length], "utf-8")
+
+    def close(self):
+        if self.__map is not None:
+            self.__map.close()
+        self.__file.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from OopGroup2023 import CHARACTER_KINDS
+    from scenario import bundle_scenario
+
+    parser = argparse.ArgumentParser(description="Pack a scenario file into a memory-mapped asset bundle.")
+    parser.add_argument("scenario", help="scenario JSON file")
+    parser.add_argument("output", help="bundle file to write")
+    parser.add_argument("--translation", nargs=2, action="append", default=[], metavar=("LOCALE", "FILE"),
+                        help="JSON object of texts by id in another language, may be repeated")
+    args = parser.parse_args()
+    with open(args.scenario, encoding="utf-8") as file:
+        data = json.load(file)
+    translations = {}
+    for locale, path in args.translation:
+        with open(path, encoding="utf-8") as file:
+            translations[locale] = json.load(file)
+    count = write_bundle(args.output, bundle_scenario(data, CHARACTER_KINDS, translations))
+    print(f"{args.output}: {count} texts, {os.path.getsize(args.output)} bytes")
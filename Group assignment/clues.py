@@ -0,0 +1,165 @@
+import re
+import sys
+import time
+
+ANSI_CODE = re.compile(r"\033\[[0-9;]*m")
+WORD = re.compile(r"[a-z0-9]+")
+
+
+class ClueInfo:
+    # The static side of a clue: its text and where it comes from. Scenarios build one per clue
+    # and every session shares it. tags name its kind ("scene", "testimony", "interview",
+    # "evidence", "passcode"), carriages the carriages it was found in or opens. plain and words
+    # are worked out from the text when asked for, most clues are never searched.
+    __slots__ = ("_text", "tags", "source", "carriages", "_words")
+
+    def __init__(self, text, tags=(), source=None, carriages=()):
+        self._text = None if text is None else sys.intern(text)  # None when a subclass reads it elsewhere
+        self.tags = tuple(tags)
+        self.source = source  # Name of the character who gave it, if any
+        self.carriages = tuple(carriages)
+        self._words = None
+
+    @property
+    def text(self):
+        return self._text  # As shown to the player, colour codes included
+
+    @property
+    def plain(self):
+        return ANSI_CODE.sub("", self.text)
+
+    @property
+    def words(self):
+        if self._words is None:
+            self._words = frozenset(WORD.findall(self.plain.lower()))
+        return self._words
+
+    def __repr__(self):
+        return f"ClueInfo({self.plain!r})"
+
+
+class Clue:
+    # One clue found in one session
+    __slots__ = ("id", "info", "found_at")
+
+    def __init__(self, id, info, found_at):
+        self.id = id  # Position in the order clues were found
+        self.info = info
+        self.found_at = found_at
+
+    @property
+    def text(self):
+        return self.info.text
+
+    @property
+    def plain(self):
+        return self.info.plain
+
+    @property
+    def tags(self):
+        return self.info.tags
+
+    @property
+    def source(self):
+        return self.info.source
+
+    @property
+    def carriages(self):
+        return self.info.carriages
+
+    def __repr__(self):
+        return f"Clue({self.id}, {self.info.plain!r})"
+
+
+class ClueStore:
+    # Deduplicated clues in the order they were found. Inverted indexes by tag, keyword, carriage
+    # and source make every query a dictionary lookup; they are only built once something asks,
+    # then kept up to date incrementally, so sessions that never query pay nothing for them.
+    __slots__ = ("__clues", "__texts", "__by_text", "__indexed", "__by_tag", "__by_word", "__by_carriage",
+                 "__by_source")
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.__clues = []
+        self.__texts = []
+        self.__by_text = {}
+        self.__indexed = 0
+        self.__by_tag = None
+        self.__by_word = None
+        self.__by_carriage = None
+        self.__by_source = None
+
+    def __len__(self):
+        return len(self.__clues)
+
+    def __iter__(self):
+        return iter(self.__clues)
+
+    def __contains__(self, text):
+        return text in self.__by_text
+
+    def add(self, text, info=None, found_at=None):
+        # Returns the new Clue, or None when the same text was already recorded
+        if text in self.__by_text:
+            return None
+        if info is None:
+            info = ClueInfo(text)
+        clue = Clue(len(self.__clues), info, time.time() if found_at is None else found_at)
+        self.__clues.append(clue)
+        self.__texts.append(info.text)
+        self.__by_text[info.text] = clue
+        return clue
+
+    def get(self, text):
+        return self.__by_text.get(text)
+
+    def texts(self):
+        return self.__texts
+
+    def __index(self):
+        clues = self.__clues
+        if self.__by_tag is None:
+            self.__by_tag, self.__by_word, self.__by_carriage, self.__by_source = {}, {}, {}, {}
+        elif self.__indexed == len(clues):
+            return
+        for clue in clues[self.__indexed:]:
+            info = clue.info
+            for tag in info.tags:
+                self.__by_tag.setdefault(tag, []).append(clue)
+            for word in info.words:
+                self.__by_word.setdefault(word, []).append(clue)
+            for carriage in info.carriages:
+                self.__by_carriage.setdefault(carriage, []).append(clue)
+            if info.source is not None:
+                self.__by_source.setdefault(info.source, []).append(clue)
+        self.__indexed = len(clues)
+
+    # The query results are the index lists themselves and must not be modified
+
+    def tagged(self, tag):
+        self.__index()
+        return self.__by_tag.get(tag, ())
+
+    def about_carriage(self, number):
+        self.__index()
+        return self.__by_carriage.get(number, ())
+
+    def from_source(self, name):
+        self.__index()
+        return self.__by_source.get(name, ())
+
+    def with_word(self, word):
+        self.__index()
+        return self.__by_word.get(word.lower(), ())
+
+    def search(self, text):
+        # Clues containing every word of text, walking only the shortest posting list
+        words = WORD.findall(text.lower())
+        if not words:
+            return []
+        postings = [self.with_word(word) for word in words]
+        shortest = min(postings, key=len)
+        wanted = set(words)
+        return [clue for clue in shortest if wanted <= clue.info.words]
@@ -0,0 +1,323 @@
+import os
+import struct
+import time
+
+from matcher import COMMANDS
+from OopGroup2023 import TRAIN_MURDER, Game, encode_snapshot
+
+# Append-only binary journal of every completed turn, plus the session and timer events
+# around them. A file is a header naming the scenario followed by fixed-size records, so it
+# can be appended to by a running server and streamed back at any record boundary.
+
+JOURNAL_MAGIC = b"TJ"
+JOURNAL_VERSION = 1
+JOURNAL_HEADER = struct.Struct("<2sBH")  # Magic, version, length of the scenario id that follows
+RECORD = struct.Struct("<dIihB")  # Wall time, session, number, password id, opcode: 19 bytes
+
+# Opcodes. Menu commands first, then the session and timer events.
+START, QUIT, EXAMINE, INTERACT, CARRIAGE, ARREST, REVIEW, INVALID, OPEN, BEGIN, EXPIRE, ABANDON = range(12)
+OPCODES = {"s": START, "q": QUIT, "e": EXAMINE, "i": INTERACT, "c": CARRIAGE, "a": ARREST, "r": REVIEW}
+
+NO_NUMBER = -2 ** 31  # The answer was not a number, or too large to be a valid choice
+NO_PASSWORD = -1  # No password given, or a wrong one
+
+
+def _number(text):
+    try:
+        number = int(text)
+    except ValueError:
+        return NO_NUMBER
+    return number if NO_NUMBER < number < 2 ** 31 else NO_NUMBER
+
+
+def _passwords(scenario):
+    # Password key -> id, in carriage order
+    passwords = {}
+    for carriage in scenario.carriages:
+        passwords.setdefault(carriage.password_key, len(passwords))
+    return passwords
+
+
+class Journal:
+    # Shared by every game of a process. Records collect in memory and go to the stream once
+    # flush_bytes have built up, on flush() and on close(); flush_bytes=0 writes every record
+    # through. Records still buffered when the process dies are lost.
+    __slots__ = ("scenario", "stream", "buffer", "flush_bytes", "next_session", "__passwords")
+
+    def __init__(self, stream, scenario=None, flush_bytes=64 * 1024, next_session=0):
+        self.scenario = TRAIN_MURDER if scenario is None else scenario
+        self.stream = stream
+        self.buffer = bytearray()
+        self.flush_bytes = flush_bytes
+        self.next_session = next_session
+        self.__passwords = _passwords(self.scenario)
+        if stream.tell() == 0:
+            scenario_id = self.scenario.id.encode("utf-8")
+            stream.write(JOURNAL_HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION, len(scenario_id)) + scenario_id)
+
+    @classmethod
+    def open(cls, path, scenario=None, flush_bytes=64 * 1024):
+        # Append to the journal at path, carrying on after the sessions it already holds. A torn
+        # last record left by a crash is cut off first, so new records start on a record boundary.
+        next_session = 0
+        if os.path.exists(path) and os.path.getsize(path):
+            replayer = replay(path, scenario)
+            next_session = max(replayer.sessions, default=-1) + 1
+            with open(path, "r+b") as file:
+                header = JOURNAL_HEADER.size + JOURNAL_HEADER.unpack(file.read(JOURNAL_HEADER.size))[2]
+                size = file.seek(0, os.SEEK_END)
+                whole = header + (size - header) // RECORD.size * RECORD.size
+                if whole < size:
+                    file.truncate(whole)
+        return cls(open(path, "ab"), scenario, flush_bytes, next_session)
+
+    def record(self, session, op, when, number=0, password=NO_PASSWORD):
+        self.buffer += RECORD.pack(when, session, number, password, op)
+        if len(self.buffer) >= self.flush_bytes:
+            self.flush()
+
+    def open_session(self, when):
+        session = self.next_session
+        self.next_session += 1
+        self.record(session, OPEN, when)
+        return session
+
+    def begin(self, session, when, round_duration):
+        self.record(session, BEGIN, when, round(round_duration * 1000))  # Whole milliseconds
+
+    def expire(self, session, when):
+        self.record(session, EXPIRE, when)
+
+    def abandon(self, session, when):
+        # The player went away before the game ended
+        self.record(session, ABANDON, when)
+
+    def command(self, session, answers, when):
+        # One completed turn, from the answers given to its prompts
+        count = len(answers)
+        op = OPCODES.get(COMMANDS.match(answers[0]), INVALID)  # Read exactly as the game read them
+        number = _number(answers[1]) if count > 1 else NO_NUMBER
+        password = (self.__passwords.get(self.scenario.passwords.match(answers[2]), NO_PASSWORD) if count > 2
+                    else NO_PASSWORD)
+        self.buffer += RECORD.pack(when, session, number, password, op)  # record() inlined, once per turn
+        if len(self.buffer) >= self.flush_bytes:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.stream.write(self.buffer)
+            self.buffer.clear()
+        self.stream.flush()
+
+    def close(self):
+        self.flush()
+        self.stream.close()
+
+
+class ReplayedSession:
+    # A session's state rebuilt from the journal: everything a snapshot holds except the
+    # answers to a turn that had not finished
+    __slots__ = ("session", "scenario", "flags", "clue_mask", "clue_ids", "clues_found", "decisions",
+                 "wrong_passwords", "start_time", "end_time", "begun_at", "round_duration", "started", "running", "outcome",
+                 "commands")
+
+    def __init__(self, session, scenario, start_time):
+        self.session = session
+        self.scenario = scenario
+        self.flags = 0
+        self.clue_mask = 0
+        self.clue_ids = []  # In the order they were found
+        self.clues_found = 0  # PlayerStats.clues_found
+        self.decisions = []  # PlayerStats.decisions_made
+        self.wrong_passwords = []  # PlayerStats.wrong_passwords
+        self.start_time = start_time
+        self.end_time = None
+        self.begun_at = None  # Wall time the round clock started
+        self.round_duration = scenario.round_duration
+        self.started = False
+        self.running = True
+        self.outcome = None
+        self.commands = 0
+
+    @property
+    def clues(self):
+        clues = self.scenario.clues
+        return [clues[clue_id] for clue_id in self.clue_ids]
+
+    @property
+    def deadline(self):
+        return None if self.begun_at is None else self.begun_at + self.round_duration
+
+    def snapshot(self):
+        # The Game.snapshot() the session would have produced between two turns
+        status = (1 if self.running else 0) | (2 if self.started else 0)
+        deadline = self.deadline if self.outcome is None else None
+        return encode_snapshot(self.scenario, status, self.outcome, self.clues_found, self.start_time,
+                               self.end_time, deadline, self.round_duration, self.flags, self.clues,
+                               self.decisions, self.wrong_passwords)
+
+    def restore(self, audio=False):
+        # A live Game in this session's state, e.g. to carry on after a crash
+        return Game.restore(self.snapshot(), audio, self.scenario)
+
+
+class Replayer:
+    # Rebuilds sessions by applying journal records to plain state with the scenario's
+    # transition tables. No game objects, generators, output or audio are involved.
+    __slots__ = ("scenario", "sessions", "records", "skipped", "__examination", "__groups", "__carriages",
+                 "__arrests")
+
+    def __init__(self, scenario=None):
+        self.scenario = TRAIN_MURDER if scenario is None else scenario
+        self.sessions = {}  # Session number -> ReplayedSession
+        self.records = 0
+        self.skipped = 0  # Records of sessions opened before the journal starts
+
+        # (flag bit, clue mask, clue ids) per unlocking command, carriages with their password id
+        scenario = self.scenario
+        unlocks = {}
+        for action in scenario.actions:
+            if action.bit:
+                mask = 0
+                for clue_id in action.clues:
+                    mask |= 1 << clue_id
+                unlocks[action.command[:2]] = (action.bit, mask, action.clues)
+        self.__examination = unlocks[("e",)]
+        self.__groups = {number: unlocks[("i", number)] for number in scenario.groups}
+        passwords = _passwords(scenario)
+        self.__carriages = {carriage.number: unlocks[("c", carriage.number)] + (passwords[carriage.password_key],)
+                            for carriage in scenario.carriages}
+        self.__arrests = {number: ("Arrested " + character._name,
+                                   "won" if number == scenario.culprit_number else "lost")
+                          for number, character in enumerate(scenario.lineup, start=1)}
+
+    def feed(self, data):
+        # Apply whole records, data must start on a record boundary
+        sessions = self.sessions
+        examination = self.__examination
+        groups = self.__groups
+        carriages = self.__carriages
+        arrests = self.__arrests
+        count = 0
+        for when, session, number, password, op in RECORD.iter_unpack(data):
+            count += 1
+            state = sessions.get(session)
+            if state is None:
+                if op == OPEN:
+                    sessions[session] = ReplayedSession(session, self.scenario, when)
+                else:
+                    self.skipped += 1
+                continue
+            if op < OPEN:
+                # A completed turn
+                state.end_time = when
+                state.commands += 1
+                if not state.started:
+                    if op == START:
+                        state.started = True
+                    elif op == QUIT:
+                        state.running = False
+                        state.outcome = "quit"
+                    continue
+                if op == INTERACT:
+                    state.clues_found += 1
+                    unlock = groups.get(number)
+                elif op == CARRIAGE:
+                    unlock = carriages.get(number)
+                    if unlock is not None and unlock[3] != password:
+                        if not state.flags & unlock[0]:  # Only a locked carriage asks for its password
+                            state.wrong_passwords.append(number)
+                        continue
+                elif op == EXAMINE:
+                    state.clues_found += 1
+                    unlock = examination
+                elif op == ARREST:
+                    arrest = arrests.get(number)
+                    if arrest is not None:
+                        state.decisions.append(arrest[0])
+                        state.outcome = arrest[1]
+                        state.running = False
+                    continue
+                elif op == QUIT:
+                    state.running = False
+                    state.outcome = "quit"
+                    continue
+                else:
+                    continue  # Reviewing clues and invalid commands change nothing
+                if unlock is None or state.flags & unlock[0]:
+                    continue
+                state.flags |= unlock[0]
+                new = unlock[1] & ~state.clue_mask
+                if new:
+                    state.clue_mask |= new
+                    if new == unlock[1]:
+                        state.clue_ids.extend(unlock[2])
+                    else:
+                        state.clue_ids.extend(clue_id for clue_id in unlock[2] if new >> clue_id & 1)
+            elif op == BEGIN:
+                state.begun_at = when
+                state.round_duration = number / 1000
+            elif op == EXPIRE:
+                state.running = False
+                if state.outcome is None:
+                    state.outcome = "timeout"
+            elif op == ABANDON:
+                state.running = False
+                if state.outcome is None:
+                    state.outcome = "abandoned"
+            elif op == OPEN:
+                # The session number came round again: a recycled game starting over
+                sessions[session] = ReplayedSession(session, self.scenario, when)
+        self.records += count
+
+    def read(self, stream, chunk_records=65536):
+        # Stream a journal file through feed(), one chunk at a time
+        header = stream.read(JOURNAL_HEADER.size)
+        if len(header) < JOURNAL_HEADER.size:
+            raise ValueError("Not a command journal.")
+        magic, version, id_length = JOURNAL_HEADER.unpack(header)
+        if magic != JOURNAL_MAGIC:
+            raise ValueError("Not a command journal.")
+        if version != JOURNAL_VERSION:
+            raise ValueError(f"Unsupported journal version: {version}")
+        scenario_id = stream.read(id_length).decode("utf-8")
+        if scenario_id != self.scenario.id:
+            raise ValueError(f"Journal belongs to scenario '{scenario_id}', not '{self.scenario.id}'.")
+        chunk_size = chunk_records * RECORD.size
+        while True:
+            data = stream.read(chunk_size)
+            whole = len(data) - len(data) % RECORD.size  # A torn last record from a crash is dropped
+            if whole:
+                self.feed(memoryview(data)[:whole])
+            if len(data) < chunk_size:
+                return self
+
+
+def replay(path, scenario=None):
+    with open(path, "rb") as stream:
+        return Replayer(scenario).read(stream)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay a command journal and summarise its sessions.")
+    parser.add_argument("journal")
+    parser.add_argument("--session", type=int, default=None, help="show one session in detail")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    replayer = replay(args.journal)
+    elapsed = time.perf_counter() - start
+    print(f"{replayer.records} records, {len(replayer.sessions)} sessions in {elapsed:.3f} s "
+          f"({replayer.records / max(elapsed, 1e-9):.0f} records/s)")
+    outcomes = {}
+    for state in replayer.sessions.values():
+        outcomes[state.outcome] = outcomes.get(state.outcome, 0) + 1
+    print(f"Outcomes: {outcomes}")
+    if args.session is not None:
+        state = replayer.sessions[args.session]
+        print(f"Session {state.session}: outcome {state.outcome}, {state.commands} commands, "
+              f"{state.clues_found} clues found, decisions {state.decisions}")
+        for clue in state.clues:
+            print(f"  {clue}")
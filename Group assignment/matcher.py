@@ -0,0 +1,156 @@
+import unicodedata
+
+# Player input is normalised once (case, accents, runs of whitespace) and matched against a
+# trie of the accepted phrases. Exact hits are a dictionary lookup; anything else walks the
+# trie with one edit-distance row per node, below the first character typed, so only prefixes
+# still within the tolerance are visited however many phrases the scenario holds.
+
+# Trie nodes are [children by character, (tolerance, value) of the phrase ending there or None,
+# then the largest tolerance, shortest and longest length of any phrase at or below the node
+# that tolerates typos at all]
+_CHILDREN, _ENTRY, _LIMIT, _SHORTEST, _LONGEST = range(5)
+
+
+def normalize(text):
+    text = str(text)
+    if not text.isascii():
+        # Accents come apart under NFKD and the combining marks are dropped
+        text = "".join(char for char in unicodedata.normalize("NFKD", text) if not unicodedata.combining(char))
+    return " ".join(text.casefold().split())
+
+
+def tolerance(phrase, max_distance):
+    # Typos allowed for a phrase: none for numbers and short words, then one per five characters.
+    # Numeric codes stay exact so they cannot be guessed a digit at a time.
+    if phrase.replace(" ", "").isdigit():
+        return 0
+    return min(max_distance, len(phrase) // 5)
+
+
+class Matcher:
+    # Phrases -> values with typo tolerance. Distances count insertions, deletions, substitutions
+    # and swaps of neighbouring characters. A typo that lands as close to two different values
+    # matches neither. The first character has to be right: players rarely get it wrong, and a
+    # miss then only walks the one branch of the trie below it, not every branch.
+    __slots__ = ("max_distance", "__exact", "__root")
+
+    def __init__(self, phrases=(), max_distance=2):
+        self.max_distance = max_distance
+        self.__exact = {}
+        self.__root = [{}, None, 0, float("inf"), 0]
+        for phrase in phrases:
+            self.add(phrase)
+
+    def __len__(self):
+        return len(self.__exact)
+
+    def __contains__(self, text):
+        return normalize(text) in self.__exact
+
+    def add(self, phrase, value=None):
+        # value defaults to the normalised phrase
+        key = normalize(phrase)
+        if not key:
+            raise ValueError("Cannot match an empty phrase.")
+        value = key if value is None else value
+        self.__exact[key] = value
+        allowed = tolerance(key, self.max_distance)
+        node = self.__root
+        for char in key:
+            self.__widen(node, allowed, len(key))
+            child = node[_CHILDREN].get(char)
+            if child is None:
+                child = node[_CHILDREN][char] = [{}, None, 0, float("inf"), 0]
+            node = child
+        self.__widen(node, allowed, len(key))
+        node[_ENTRY] = (allowed, value)
+
+    @staticmethod
+    def __widen(node, allowed, length):
+        if not allowed:
+            return
+        node[_LIMIT] = max(node[_LIMIT], allowed)
+        node[_SHORTEST] = min(node[_SHORTEST], length)
+        node[_LONGEST] = max(node[_LONGEST], length)
+
+    def exact(self, text):
+        return self.__exact.get(normalize(text))
+
+    def match(self, text):
+        # The value of the closest phrase within its tolerance, None when there is none
+        value = self.__exact.get(text)  # Typed exactly as added, no need to normalise
+        if value is not None:
+            return value
+        word = normalize(text)
+        value = self.__exact.get(word)
+        root = self.__root
+        if (value is not None or not root[_LIMIT] or len(word) - root[_LONGEST] > root[_LIMIT]
+                or root[_SHORTEST] - len(word) > root[_LIMIT]):
+            return value
+        start = root[_CHILDREN].get(word[:1])
+        if start is None or not start[_LIMIT]:
+            return None
+        first = list(range(len(word) + 1))
+        for bound in range(1, start[_LIMIT] + 1):
+            # One typo first: far fewer prefixes stay within one edit than within two
+            best = [bound, set()]  # Closest distance so far, values found at it
+            self.__search(start, word[0], "", 1, word, first, None, best)
+            if best[1]:
+                return next(iter(best[1])) if len(best[1]) == 1 else None
+        return None
+
+    def __search(self, node, char, previous_char, depth, word, previous_row, row_before, best):
+        # One optimal-string-alignment row for the prefix ending in char. Only the band of cells
+        # within the current bound of the diagonal can still lead to a match; the rest stay at
+        # bound + 1.
+        bound = min(best[0], node[_LIMIT])
+        size = len(word)
+        if size - node[_LONGEST] > bound or node[_SHORTEST] - size > bound:
+            return  # Every phrase below is too much longer or shorter
+        low, high = max(1, depth - bound), min(size, depth + bound)
+        row = [bound + 1] * (size + 1)
+        row[0] = depth if depth <= bound else bound + 1
+        closest = row[0]
+        for index in range(low, high + 1):
+            wanted = word[index - 1]
+            distance = previous_row[index - 1] + (wanted != char)
+            if row[index - 1] + 1 < distance:
+                distance = row[index - 1] + 1
+            if previous_row[index] + 1 < distance:
+                distance = previous_row[index] + 1
+            if (row_before is not None and index > 1 and wanted == previous_char
+                    and word[index - 2] == char and row_before[index - 2] + 1 < distance):
+                distance = row_before[index - 2] + 1
+            row[index] = distance
+            if distance < closest:
+                closest = distance
+        if closest > bound:
+            return
+
+        entry = node[_ENTRY]
+        if entry is not None and row[-1] <= entry[0] and row[-1] <= best[0]:
+            if row[-1] < best[0]:
+                best[0] = row[-1]
+                best[1] = {entry[1]}
+            else:
+                best[1].add(entry[1])
+
+        for next_char, child in node[_CHILDREN].items():
+            self.__search(child, next_char, char, depth + 1, word, row, previous_row, best)
+
+# Main menu commands by letter, with the words players type instead
+COMMAND_ALIASES = {
+    "q": ("quit", "exit"),
+    "s": ("start",),
+    "a": ("arrest",),
+    "i": ("interact", "talk"),
+    "e": ("examine", "inspect"),
+    "c": ("carriage", "door"),
+    "r": ("review", "clues"),
+}
+
+COMMANDS = Matcher()
+for _letter, _aliases in COMMAND_ALIASES.items():
+    COMMANDS.add(_letter)
+    for _alias in _aliases:
+        COMMANDS.add(_alias, _letter)
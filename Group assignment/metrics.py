@@ -0,0 +1,164 @@
+import threading
+from collections import Counter
+
+from matcher import COMMANDS
+from scheduler import scheduler
+
+# Command latencies go into power-of-two nanosecond buckets: bucket k holds durations below 2**k ns,
+# so recording one is an int.bit_length() call instead of a search through the bucket bounds.
+BUCKETS = 36  # Up to 2**35 ns, about 34 seconds
+
+FOLD_EVERY = 4096  # Pending command keys kept before they are counted
+
+COMMAND_NAMES = {"s": "start", "q": "quit", "a": "arrest", "i": "interact", "e": "examine", "c": "carriage",
+                 "r": "review"}
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "total_ns")
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total_ns = 0
+
+    def observe(self, ns):
+        self.counts[min(ns.bit_length(), BUCKETS - 1)] += 1
+        self.count += 1
+        self.total_ns += ns
+
+    def quantile(self, fraction):
+        # Upper bound of the bucket holding the quantile, in seconds
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return (1 << bucket) / 1e9
+        return (1 << (BUCKETS - 1)) / 1e9
+
+    def summary(self):
+        return {"count": self.count, "sum_seconds": self.total_ns / 1e9, "p50_seconds": self.quantile(0.5),
+                "p99_seconds": self.quantile(0.99)}
+
+
+class Metrics:
+    # Exact command counters plus latency histograms of a sample of the commands, shared by any
+    # number of games. Counting is one list append; the counts are folded in batches. A Game
+    # created without a Metrics object skips all of it.
+    __slots__ = ("commands", "counts", "pending", "sample_mask", "__fold_lock")
+
+    def __init__(self, sample_every=64):
+        if sample_every < 1 or sample_every & (sample_every - 1):
+            raise ValueError("sample_every must be a power of two.")
+        self.commands = {}  # Command name -> Histogram of the sampled latencies
+        self.counts = Counter()  # Command name -> commands handled
+        self.pending = []  # First part of each command not yet folded into counts
+        self.sample_mask = sample_every - 1  # Time the command when len(pending) & sample_mask == 0
+        self.__fold_lock = threading.Lock()  # Games fold as they go and a scrape folds from its own thread
+
+    def fold(self):
+        # Games keep appending while this runs, so only the commands counted here are removed
+        with self.__fold_lock:
+            pending = self.pending
+            folded = len(pending)
+            if folded:
+                for key, count in Counter(pending[:folded]).items():
+                    self.counts[command_name(key)] += count
+                del pending[:folded]
+
+    def observe_command(self, key, ns):
+        name = command_name(key)
+        histogram = self.commands.get(name)
+        if histogram is None:
+            histogram = self.commands[name] = Histogram()
+        histogram.observe(ns)
+        if len(self.pending) >= FOLD_EVERY:
+            self.fold()
+
+    def snapshot(self):
+        self.fold()
+        return {name: {"count": count, "sampled": self.commands[name].summary() if name in self.commands else None}
+                for name, count in sorted(self.counts.items())}
+
+
+def command_name(key):
+    # Bounded label set: menu commands by name, anything else (answers to a command's own
+    # prompts, typos) as "other"
+    return COMMAND_NAMES.get(COMMANDS.match(key), "other")
+
+
+def runtime_values(audio=None):
+    # Process-wide figures as (name, type, help, value): the timer thread, threads and audio
+    values = [("game_scheduler_pending_deadlines", "gauge", "Deadline entries in the scheduler heap, cancelled ones until skipped.",
+               len(scheduler)),
+              ("game_scheduler_wakeups_total", "counter", "Times the scheduler thread woke up.", scheduler.wakeups),
+              ("game_threads", "gauge", "Live threads in the process.", threading.active_count())]
+    if audio is not None:
+        for key, value in audio.stats().items():
+            values.append((f"game_audio_{key}", "counter", f"Audio {key.replace('_', ' ')}.", value))
+    return values
+
+
+def prometheus_text(metrics, values=()):
+    # Prometheus text exposition format for the command histograms plus (name, type, help, value) entries
+    metrics.fold()
+    lines = ["# HELP game_commands_total Commands handled.",
+             "# TYPE game_commands_total counter"]
+    for name, count in sorted(metrics.counts.items()):
+        lines.append(f'game_commands_total{{command="{name}"}} {count}')
+    lines.append(f"# HELP game_command_seconds Time to handle one command, sampled 1 in {metrics.sample_mask + 1}.")
+    lines.append("# TYPE game_command_seconds histogram")
+    for name, histogram in sorted(metrics.commands.items()):
+        cumulative = 0
+        for bucket, count in enumerate(histogram.counts):
+            cumulative += count
+            lines.append(f'game_command_seconds_bucket{{command="{name}",le="{(1 << bucket) / 1e9:.9g}"}} '
+                         f'{cumulative}')
+        lines.append(f'game_command_seconds_bucket{{command="{name}",le="+Inf"}} {histogram.count}')
+        lines.append(f'game_command_seconds_sum{{command="{name}"}} {histogram.total_ns / 1e9:.9g}')
+        lines.append(f'game_command_seconds_count{{command="{name}"}} {histogram.count}')
+    for name, kind, help_text, value in values:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    # Local /metrics endpoint on a daemon thread. collect() returns the exposition text.
+    def __init__(self, collect, host="127.0.0.1", port=9123):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # Only paid when serving
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = collect().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes are not worth a line on stderr each
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-http", daemon=True)
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,236 @@
+import argparse
+import multiprocessing
+import os
+import random
+import time
+from collections import Counter
+
+from OopGroup2023 import CHARACTER_KINDS, ERROR, TRAIN_MURDER, Game
+from scenario import load_scenario
+
+# Monte Carlo playtesting: many headless games spread over a process pool. Games run silently
+# on a simulated clock, so a whole round takes microseconds instead of five minutes.
+
+
+class Tally:
+    # Aggregated results of a batch of games, small enough to send back from a worker cheaply
+    __slots__ = ("games", "outcomes", "clues_found", "decisions", "commands", "wrong_passwords",
+                 "game_seconds")
+
+    def __init__(self):
+        self.games = 0
+        self.outcomes = Counter()  # "won", "lost", "timeout" or "quit"
+        self.clues_found = Counter()  # PlayerStats.clues_found -> number of games
+        self.decisions = Counter()  # PlayerStats.decisions_made entries
+        self.commands = 0
+        self.wrong_passwords = 0
+        self.game_seconds = 0.0  # Simulated time spent in all games
+
+    def add(self, game, commands, wrong_passwords, seconds):
+        stats = game.player_stats
+        self.games += 1
+        self.outcomes[game.outcome] += 1
+        self.clues_found[stats.clues_found] += 1
+        self.decisions.update(stats.decisions_made)
+        self.commands += commands
+        self.wrong_passwords += wrong_passwords
+        self.game_seconds += seconds
+
+    def merge(self, other):
+        self.games += other.games
+        self.outcomes.update(other.outcomes)
+        self.clues_found.update(other.clues_found)
+        self.decisions.update(other.decisions)
+        self.commands += other.commands
+        self.wrong_passwords += other.wrong_passwords
+        self.game_seconds += other.game_seconds
+
+    def win_rate(self):
+        return self.outcomes["won"] / self.games if self.games else 0.0
+
+    def summary(self):
+        games = max(self.games, 1)
+        lines = [f"Games played: {self.games}",
+                 f"Win rate: {self.win_rate():.2%}"]
+        lines.extend(f"  {outcome}: {count} ({count / games:.2%})" for outcome, count in self.outcomes.most_common())
+        lines.append(f"Average commands per game: {self.commands / games:.2f}")
+        lines.append(f"Average game length: {self.game_seconds / games:.1f} simulated seconds")
+        lines.append(f"Wrong passwords per game: {self.wrong_passwords / games:.3f}")
+        lines.append("Clues found (PlayerStats.clues_found):")
+        lines.extend(f"  {clues:>3}: {count / games:.2%}" for clues, count in sorted(self.clues_found.items()))
+        lines.append("Decisions made:")
+        lines.extend(f"  {decision}: {count / games:.2%}" for decision, count in self.decisions.most_common())
+        return "\n".join(lines)
+
+
+class RandomPlayer:
+    # Wanders the menu at random. Doors are opened with the right password only once the clues
+    # held reveal it, otherwise the player guesses. The culprit is picked more often as clues pile up.
+    __slots__ = ("scenario", "rng", "arrest_rate", "typo_rate", "doors", "groups", "clue_count", "held",
+                 "wrong_passwords")
+
+    def __init__(self, scenario, rng, arrest_rate=0.08, typo_rate=0.05):
+        self.scenario = scenario
+        self.rng = rng
+        self.arrest_rate = arrest_rate
+        self.typo_rate = typo_rate
+        self.doors = []
+        for action in scenario.actions:
+            if action.command[0] == "c":
+                masks = []
+                for clue_ids in action.requires:
+                    mask = 0
+                    for clue_id in clue_ids:
+                        mask |= 1 << clue_id
+                    masks.append(mask)
+                self.doors.append((action.command, tuple(masks)))
+        self.groups = len(scenario.groups)
+        self.clue_count = len(scenario.clues)
+        self.reset()
+
+    def reset(self):
+        self.held = 0
+        self.wrong_passwords = 0
+
+    def observe(self, result):
+        clue_index = self.scenario.clue_index
+        for clue in result.clues:
+            clue_id = clue_index.get(clue)
+            if clue_id is not None:
+                self.held |= 1 << clue_id
+
+    def command(self, game):
+        rng = self.rng
+        if rng.random() < self.typo_rate:
+            return rng.choice((("x",), ("i", self.groups + 1), ("c", 0), ("a", 0)))
+        if rng.random() < self.arrest_rate:
+            return ("a", self.suspect())
+        choice = rng.random()
+        if choice < 0.2:
+            return ("e",)
+        if choice < 0.45:
+            return ("i", rng.randint(1, self.groups))
+        if choice < 0.5:
+            return ("r",)
+        command, masks = rng.choice(self.doors)
+        if all(self.held & mask for mask in masks):
+            return command
+        if not game.flags & self.scenario.carriages[command[1] - 1].bit:
+            self.wrong_passwords += 1
+        return ("c", command[1], str(rng.randint(0, 9999)))
+
+    def suspect(self):
+        found = bin(self.held).count("1") / max(self.clue_count, 1)
+        if self.rng.random() < found:
+            return self.scenario.culprit_number
+        return self.rng.randint(1, len(self.scenario.lineup))
+
+
+class ScriptedPlayer:
+    # Replays a fixed route, e.g. the solver's shortest complete win, to see whether it fits the clock
+    __slots__ = ("script", "position", "wrong_passwords")
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.reset()
+
+    def reset(self):
+        self.position = 0
+        self.wrong_passwords = 0
+
+    def observe(self, result):
+        pass
+
+    def command(self, game):
+        command = self.script[self.position]
+        self.position += 1
+        return command
+
+
+def play(game, player, rng, think_time):
+    # One game on a simulated clock. Every command costs a random amount of thinking time and
+    # the round expires once the clock passes the game's round duration.
+    clock = 0.0
+    commands = 1
+    player.reset()
+    result = game.step(("s", "Agent"))
+    while not result.finished:
+        clock += rng.uniform(*think_time)
+        if clock >= game.round_duration:
+            game.expire()
+            break
+        result = game.step(player.command(game))
+        player.observe(result)
+        commands += 1
+    return commands, min(clock, game.round_duration)
+
+
+# ---- Worker processes ----------------------------------------------------
+
+_scenario = None
+
+
+def _init_worker(scenario_path):
+    global _scenario
+    _scenario = TRAIN_MURDER if scenario_path is None else load_scenario(scenario_path, CHARACTER_KINDS)
+
+
+def _make_player(policy, scenario, rng):
+    if policy == "random":
+        return RandomPlayer(scenario, rng)
+    if policy == "solver":
+        from solver import Solver
+        return ScriptedPlayer(Solver(scenario).solve().shortest_complete_win[1:])
+    raise ValueError(f"Unknown policy: {policy}")
+
+
+def run_batch(task):
+    # Plays a whole batch in one task so results travel back once per batch, not once per game
+    seed, games, policy, think_time, round_duration = task
+    rng = random.Random(seed)
+    player = _make_player(policy, _scenario, rng)
+    tally = Tally()
+    for _ in range(games):
+        game = Game(audio=False, log_level=ERROR, scenario=_scenario)
+        if round_duration is not None:
+            game.round_duration = round_duration
+        commands, seconds = play(game, player, rng, think_time)
+        tally.add(game, commands, player.wrong_passwords, seconds)
+    return tally
+
+
+def simulate(games, workers=None, batch_size=2000, seed=0, policy="random", think_time=(5.0, 40.0),
+             round_duration=None, scenario_path=None, on_batch=None):
+    # Batches are seeded by their index, so the totals do not depend on the number of workers
+    tasks = []
+    for index, start in enumerate(range(0, games, batch_size)):
+        tasks.append((seed * 1000003 + index, min(batch_size, games - start), policy, tuple(think_time),
+                      round_duration))
+    total = Tally()
+    with multiprocessing.Pool(workers or os.cpu_count(), _init_worker, (scenario_path,)) as pool:
+        for tally in pool.imap_unordered(run_batch, tasks):
+            total.merge(tally)
+            if on_batch is not None:
+                on_batch(total)
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play many simulated games and report the balance.")
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=None, help="defaults to one per core")
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--policy", choices=("random", "solver"), default="random")
+    parser.add_argument("--think-time", type=float, nargs=2, default=(5.0, 40.0), metavar=("MIN", "MAX"),
+                        help="simulated seconds a player spends on each command")
+    parser.add_argument("--round-duration", type=float, default=None, help="override the scenario's time limit")
+    parser.add_argument("--scenario", default=None, help="scenario JSON file, defaults to the Train Murder")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    tally = simulate(args.games, args.workers, args.batch_size, args.seed, args.policy, args.think_time,
+                     args.round_duration, args.scenario)
+    elapsed = time.perf_counter() - start
+    print(tally.summary())
+    print(f"Simulated {tally.games} games in {elapsed:.2f} s ({tally.games / elapsed:.0f} games/s)")
@@ -0,0 +1,72 @@
+import time
+from collections import deque
+
+from OopGroup2023 import INFO, TRAIN_MURDER, Game
+
+
+class SessionPool:
+    # Recycles finished games instead of building a new one per investigation. release() resets
+    # a game and parks it; acquire() hands back the most recently parked one, or builds a game
+    # when none is idle. Every pooled game shares the pool's scenario, audio backend, metrics and
+    # journal. At most capacity games stay idle, and games idle for longer than idle_timeout
+    # seconds are dropped, oldest first.
+    __slots__ = ("scenario", "audio", "log_level", "metrics", "journal", "capacity", "idle_timeout", "__idle",
+                 "created", "reused", "evicted")
+
+    def __init__(self, capacity=1024, idle_timeout=300.0, scenario=None, audio=False, log_level=INFO, metrics=None,
+                 journal=None):
+        self.scenario = TRAIN_MURDER if scenario is None else scenario
+        self.audio = audio
+        self.log_level = log_level
+        self.metrics = metrics
+        self.journal = journal
+        self.capacity = capacity
+        self.idle_timeout = idle_timeout
+        self.__idle = deque()  # (released at, game), oldest on the left
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.__idle)
+
+    def acquire(self):
+        idle = self.__idle
+        if idle:
+            self.reused += 1
+            game = idle.pop()[1]  # The warmest game, the one released last
+            game.player_stats.set_start_time()  # Time spent parked is not part of the next session
+            return game
+        self.created += 1
+        return Game(self.audio, self.log_level, self.scenario, self.metrics, self.journal)
+
+    def release(self, game):
+        # Hand a game back once its player is done with it. The game must not be used afterwards.
+        if game.scenario is not self.scenario:
+            raise ValueError("Game belongs to a different scenario than this pool.")
+        game.reset()  # Cancels its deadline now rather than when it is next handed out
+        now = time.monotonic()
+        idle = self.__idle
+        idle.append((now, game))
+        if len(idle) > self.capacity:
+            idle.popleft()
+            self.evicted += 1
+        self.evict_idle(now)
+
+    def evict_idle(self, now=None):
+        # Drop games idle for longer than idle_timeout, returns how many went
+        cutoff = (time.monotonic() if now is None else now) - self.idle_timeout
+        idle = self.__idle
+        evicted = 0
+        while idle and idle[0][0] < cutoff:
+            idle.popleft()
+            evicted += 1
+        self.evicted += evicted
+        return evicted
+
+    def clear(self):
+        self.evicted += len(self.__idle)
+        self.__idle.clear()
+
+    def stats(self):
+        return {"idle": len(self.__idle), "created": self.created, "reused": self.reused, "evicted": self.evicted}
@@ -0,0 +1,63 @@
+import os
+import sys
+
+from clues import ANSI_CODE
+
+
+def wants_color(stream):
+    # Colour only on a real terminal, and never when NO_COLOR is set
+    if os.environ.get("NO_COLOR"):
+        return False
+    isatty = getattr(stream, "isatty", None)
+    return bool(isatty is not None and isatty())
+
+
+class Renderer:
+    # Builds a whole turn of output as one string. With colour off, each distinct line is
+    # stripped once and remembered, so static screens cost a dictionary lookup afterwards.
+    __slots__ = ("color", "cache_size", "__plain")
+
+    def __init__(self, color=True, cache_size=4096):
+        self.color = color
+        self.cache_size = cache_size  # Dynamic lines such as the time remaining stop being cached when full
+        self.__plain = {}
+
+    def plain(self, text):
+        plain = self.__plain.get(text)
+        if plain is None:
+            plain = ANSI_CODE.sub("", text) if "\033" in text else text
+            if len(self.__plain) < self.cache_size:
+                self.__plain[text] = plain
+        return plain
+
+    def frame(self, lines, prompt=None):
+        if not self.color:
+            lines = [self.plain(line) for line in lines]
+            if prompt is not None:
+                prompt = self.plain(prompt)
+        text = "\n".join(lines)
+        if lines:
+            text += "\n"
+        if prompt is not None:
+            text += prompt
+        return text
+
+
+class Terminal:
+    # Console output with one buffered write and flush per frame instead of a print() per line
+    __slots__ = ("stream", "renderer")
+
+    def __init__(self, stream=None, color=None):
+        self.stream = sys.stdout if stream is None else stream
+        self.renderer = Renderer(wants_color(self.stream) if color is None else color)
+
+    def write(self, lines, prompt=None):
+        text = self.renderer.frame(lines, prompt)
+        if text:
+            self.stream.write(text)
+            self.stream.flush()
+
+    def ask(self, lines, prompt):
+        # Show the frame ending in the prompt, then read the answer
+        self.write(lines, prompt)
+        return input()
@@ -0,0 +1,574 @@
+import copy
+import json
+import os
+import threading
+from collections import deque
+
+from bundle import BUNDLE_SUFFIX, AssetBundle
+from clues import WORD, ClueInfo
+from matcher import Matcher, normalize
+
+SCENARIO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios")
+SCENARIO_FORMAT = 1
+SKELETON_ID = "scenario.json"  # Bundle text holding the scenario file without its bundled texts
+CHARACTER_TEXTS = ("dialogue", "statement", "action")  # Bundled as "characters.<key>.<field>"
+
+# Colour names usable as {name} markup in scenario text
+COLORS = {
+    "green": "\033[92m",
+    "dark_green": "\033[32m",
+    "yellow": "\033[33m",
+    "light_yellow": "\033[93m",
+    "red": "\033[91m",
+    "dark_red": "\033[31m",
+    "blue": "\033[94m",
+    "white": "\033[97m",
+    "turquoise": "\033[38;2;64;224;208m",
+    "reset": "\033[0m",
+}
+
+
+class ScenarioError(ValueError):
+    pass
+
+
+class _Markup(dict):
+    # Leaves runtime placeholders such as {player_name} untouched while colours are filled in
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+
+_MARKUP = _Markup(COLORS)
+
+
+class _ShownTexts:
+    # Texts read from a bundle are kept as plain attributes of the objects that show them, so
+    # showing one again costs what it does for a scenario read from JSON. Only the texts kept
+    # last, up to max_chars characters, stay: older ones are deleted again, and read from the
+    # bundle afresh when next shown.
+    __slots__ = ("max_chars", "used_chars", "__kept", "__lock")
+
+    def __init__(self, max_chars):
+        self.max_chars = max_chars
+        self.used_chars = 0
+        self.__kept = deque()  # (object, attribute, characters), oldest first
+        self.__lock = threading.Lock()
+
+    def keep(self, owner, name, value):
+        setattr(owner, name, value)
+        size = len(value) if isinstance(value, str) else sum(map(len, value))
+        with self.__lock:
+            kept = self.__kept
+            kept.append((owner, name, size))
+            self.used_chars += size
+            while self.used_chars > self.max_chars and len(kept) > 1:
+                owner, name, size = kept.popleft()
+                self.used_chars -= size
+                try:
+                    delattr(owner, name)
+                except AttributeError:
+                    pass  # Kept twice by two threads at once, and already dropped
+        return value
+
+
+_SHOWN = _ShownTexts(256 * 1024)  # Shared by every bundled scenario in the process
+
+
+class _BundledText:
+    # Scenarios loaded from an asset bundle leave their texts unset and read them from the
+    # bundle's memory map when the game shows them, kept in _SHOWN for next time. BUNDLED maps
+    # each such attribute to its id under _text_prefix() and whether it is a list of lines.
+    __slots__ = ()
+    BUNDLED = {}
+
+    def _text_prefix(self):
+        return ""
+
+    def __getattr__(self, name):
+        # Only reached for attributes that are not set
+        spec = type(self).BUNDLED.get(name)
+        if spec is None or self.texts is None:
+            raise AttributeError(name)
+        key = self._text_prefix() + spec[0]
+        return _SHOWN.keep(self, name, self.texts.lines(key) if spec[1] else self.texts.text(key))
+
+
+def _flag_bit(owner):
+    # Flag masks are made when asked for, kept they would cost memory quadratic in the flag count
+    return 1 << owner.flag
+
+
+class Carriage(_BundledText):
+    __slots__ = ("number", "label", "approach", "prompt", "password", "password_key", "success", "clue",
+                 "failure", "visited", "flag", "texts")
+    BUNDLED = {"approach": ("approach", True), "prompt": ("prompt", False), "success": ("success", True),
+               "clue": ("clue", False), "failure": ("failure", False), "visited": ("visited", False)}
+    bit = property(_flag_bit)
+
+    def _text_prefix(self):
+        return f"carriages.{self.number - 1}."
+
+
+class InteractionGroup(_BundledText):
+    # speakers holds (character, evidence) pairs, evidence speakers' lines are recorded as clues
+    __slots__ = ("number", "intro", "speakers", "clues", "repeat", "flag", "texts")
+    BUNDLED = {"intro": ("intro", False), "clues": ("clues", True), "repeat": ("repeat", False)}
+    bit = property(_flag_bit)
+
+    def _text_prefix(self):
+        return f"interact.groups.{self.number - 1}."
+
+
+class Examination(_BundledText):
+    __slots__ = ("intro", "lines", "clues", "repeat", "flag", "texts")
+    BUNDLED = {"intro": ("intro", False), "lines": ("lines", True), "clues": ("clues", True),
+               "repeat": ("repeat", False)}
+    bit = property(_flag_bit)
+
+    def _text_prefix(self):
+        return "examine."
+
+
+class _CharacterText:
+    # A character's dialogue, statement or action left in the bundle. Characters only format
+    # their texts into other strings, so this stands in for the string and reads it when used.
+    __slots__ = ("texts", "character", "field", "text")
+
+    def __init__(self, texts, character, field):
+        self.texts = texts
+        self.character = character  # The character's key in the scenario file
+        self.field = field
+
+    def __str__(self):
+        try:
+            return self.text
+        except AttributeError:
+            return _SHOWN.keep(self, "text", self.texts.text(f"characters.{self.character}.{self.field}"))
+
+    def __format__(self, spec):
+        return format(str(self), spec)
+
+
+class _BundledClues:
+    # The clues of a bundled scenario by id, read from the clue table packed with it. Once
+    # the scenario has its clue_info, they are read through it.
+    __slots__ = ("texts", "count", "info")
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.info = None
+        self.count = 0
+        while f"clues.{self.count}" in texts:
+            self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, clue_id):
+        if not 0 <= clue_id < self.count:
+            raise IndexError(clue_id)
+        if self.info is not None:
+            return self.info[clue_id].text
+        return self.texts.text(f"clues.{clue_id}")
+
+    def __iter__(self):
+        return (self[clue_id] for clue_id in range(self.count))
+
+
+class _ClueIndex:
+    # Clue text -> id for bundled scenarios. Keyed by the hashes of the clue texts, each read
+    # once when the scenario loads, so the texts themselves stay in the bundle. A hit is checked
+    # against the clue's text, another text with the same hash is not that clue.
+    __slots__ = ("clues", "__ids", "__collided")
+
+    def __init__(self, clues):
+        self.clues = clues
+        self.__ids = {}
+        self.__collided = {}  # Text -> id for the clues whose hash an earlier clue already has
+        for clue_id, text in enumerate(clues):
+            if self.__ids.setdefault(hash(text), clue_id) != clue_id:
+                self.__collided[text] = clue_id
+
+    def __len__(self):
+        return len(self.clues)
+
+    def __contains__(self, text):
+        return self.get(text) is not None
+
+    def __getitem__(self, text):
+        clue_id = self.get(text)
+        if clue_id is None:
+            raise KeyError(text)
+        return clue_id
+
+    def get(self, text, default=None):
+        clue_id = self.__ids.get(hash(text))
+        if clue_id is not None and self.clues[clue_id] == text:
+            return clue_id
+        return self.__collided.get(text, default)
+
+
+class _BundledClue(ClueInfo):
+    # Clue info whose text is read from the bundle's clue table when asked for
+    __slots__ = ("texts", "id")
+
+    def __init__(self, texts, clue_id, tags=(), source=None, carriages=()):
+        super().__init__(None, tags, source, carriages)
+        del self._text  # Unset until read, see _ShownTexts
+        self.texts = texts
+        self.id = clue_id
+
+    @property
+    def text(self):
+        try:
+            return self._text
+        except AttributeError:
+            return _SHOWN.keep(self, "_text", self.texts.text(f"clues.{self.id}"))
+
+
+class Action:
+    # One edge of the state-transition graph. The command sets `flag` in the game flags (`bit`
+    # is its mask, 0 without a flag) and adds `clues` (clue ids). `requires` lists, per password
+    # word, the clue ids that reveal that word.
+    __slots__ = ("command", "flag", "clues", "requires", "outcome")
+
+    def __init__(self, command, flag=None, clues=(), requires=(), outcome=None):
+        self.command = command
+        self.flag = flag
+        self.clues = tuple(clues)
+        self.requires = tuple(requires)
+        self.outcome = outcome
+
+    def __repr__(self):
+        return f"Action({self.command!r})"
+
+    @property
+    def bit(self):
+        return 0 if self.flag is None else 1 << self.flag
+
+
+class Scenario(_BundledText):
+    __slots__ = ("id", "title", "location", "round_duration", "title_screen", "welcome", "story",
+                 "characters", "interact_intro", "interact_prompt", "groups", "examination", "carriages",
+                 "door_menu", "lineup", "lineup_menu", "culprit", "culprit_number", "confession", "denial",
+                 "win", "lose", "clues", "clue_index", "clue_info", "actions", "flag_count", "passwords",
+                 "texts")
+    BUNDLED = {"title_screen": ("title_screen", True), "welcome": ("welcome", True), "story": ("story", True),
+               "interact_intro": ("interact.intro", False), "interact_prompt": ("interact.prompt", False)}
+
+    def __repr__(self):
+        return f"Scenario({self.id!r})"
+
+
+def _text(value, where):
+    if not isinstance(value, str):
+        raise ScenarioError(f"{where} must be a string.")
+    return value.format_map(_MARKUP)
+
+
+def _lines(value, where):
+    if not isinstance(value, list):
+        raise ScenarioError(f"{where} must be a list of strings.")
+    return tuple(_text(line, f"{where}[{i}]") for i, line in enumerate(value))
+
+
+def _section(data, key, where="scenario"):
+    if key not in data:
+        raise ScenarioError(f"{where} is missing '{key}'.")
+    return data[key]
+
+
+def _words(text):
+    return WORD.findall(text.lower())
+
+
+def _character_text(spec, key, field, texts, required=False):
+    # A character's text, or with texts a stand-in reading it from the bundle. None if it has none.
+    where = f"characters.{key}.{field}"
+    if texts is None:
+        if field in spec:
+            return _text(spec[field], where)
+        if required:
+            raise ScenarioError(f"characters.{key} is missing '{field}'.")
+        return None
+    if where in texts:
+        return _CharacterText(texts, key, field)
+    if required:
+        raise ScenarioError(f"{texts.path} is missing text '{where}'.")
+    return None
+
+
+def _bind(owner, texts):
+    # Point owner's narrative at the bundle, which must hold every text it needs
+    owner.texts = texts
+    if texts is not None:
+        prefix = owner._text_prefix()
+        for key, _ in type(owner).BUNDLED.values():
+            if prefix + key not in texts:
+                raise ScenarioError(f"{texts.path} is missing text '{prefix + key}'.")
+    return texts is None
+
+
+def compile_scenario(data, character_kinds, texts=None):
+    # Validate the declarative data and turn it into shared, read-only lookup tables. With
+    # texts (an AssetBundle), the texts named in each class's BUNDLED, the characters' texts and
+    # the clues stay in the bundle.
+    if not isinstance(data, dict):
+        raise ScenarioError("A scenario must be a JSON object.")
+    if data.get("format") != SCENARIO_FORMAT:
+        raise ScenarioError(f"Unsupported scenario format: {data.get('format')}")
+
+    scenario = Scenario()
+    scenario.id = _text(_section(data, "id"), "id")
+    scenario.title = _text(_section(data, "title"), "title")
+    scenario.location = _text(_section(data, "location"), "location")
+    scenario.round_duration = float(_section(data, "round_duration"))
+    if _bind(scenario, texts):
+        scenario.title_screen = _lines(data.get("title_screen", []), "title_screen")
+        scenario.welcome = _lines(_section(data, "welcome"), "welcome")
+        scenario.story = _lines(_section(data, "story"), "story")
+
+    characters = {}
+    for key, spec in _section(data, "characters").items():
+        where = f"characters.{key}"
+        kind = _section(spec, "kind", where)
+        if kind not in character_kinds:
+            raise ScenarioError(f"{where} has unknown kind '{kind}'.")
+        args = [_text(_section(spec, "name", where), f"{where}.name"),
+                _character_text(spec, key, "dialogue", texts, required=True)]
+        statement = _character_text(spec, key, "statement", texts)
+        if statement is not None:
+            args.append(statement)
+        try:
+            character = character_kinds[kind](*args)
+        except TypeError as e:
+            raise ScenarioError(f"{where} does not fit a {kind}: {e}") from e
+        action = _character_text(spec, key, "action", texts)
+        if action is not None:
+            character._action = action
+        characters[key] = (character, bool(spec.get("evidence", False)))
+    scenario.characters = {key: character for key, (character, _) in characters.items()}
+
+    def character(key, where):
+        if key not in characters:
+            raise ScenarioError(f"{where} refers to unknown character '{key}'.")
+        return characters[key]
+
+    # Flags: carriages first, then interaction groups, then the crime scene
+    flag = 0
+    carriages = []
+    for number, spec in enumerate(_section(data, "carriages"), start=1):
+        where = f"carriages[{number - 1}]"
+        carriage = Carriage()
+        carriage.number = number
+        carriage.label = _text(_section(spec, "label", where), f"{where}.label")
+        carriage.password = _text(_section(spec, "password", where), f"{where}.password")
+        if not carriage.password.strip():
+            raise ScenarioError(f"{where}.password must not be empty.")
+        carriage.password_key = normalize(carriage.password)
+        if _bind(carriage, texts):
+            carriage.approach = _lines(_section(spec, "approach", where), f"{where}.approach")
+            carriage.prompt = _text(_section(spec, "prompt", where), f"{where}.prompt")
+            carriage.success = _lines(_section(spec, "success", where), f"{where}.success")
+            carriage.clue = _text(_section(spec, "clue", where), f"{where}.clue")
+            carriage.failure = _text(_section(spec, "failure", where), f"{where}.failure")
+            carriage.visited = _text(_section(spec, "visited", where), f"{where}.visited")
+        carriage.flag = flag
+        flag += 1
+        carriages.append(carriage)
+    if not carriages:
+        raise ScenarioError("A scenario needs at least one carriage.")
+    scenario.carriages = tuple(carriages)
+    scenario.passwords = Matcher(carriage.password for carriage in carriages)  # Answers -> password_key
+    scenario.door_menu = tuple(f"{carriage.number}. {carriage.label}" for carriage in carriages)
+
+    interact = _section(data, "interact")
+    if scenario.texts is None:
+        scenario.interact_intro = _text(_section(interact, "intro", "interact"), "interact.intro")
+        scenario.interact_prompt = _text(_section(interact, "prompt", "interact"), "interact.prompt")
+    groups = {}
+    for number, spec in enumerate(_section(interact, "groups", "interact"), start=1):
+        where = f"interact.groups[{number - 1}]"
+        group = InteractionGroup()
+        group.number = number
+        if _bind(group, texts):
+            group.intro = _text(_section(spec, "intro", where), f"{where}.intro")
+            group.clues = _lines(spec.get("clues", []), f"{where}.clues")
+            group.repeat = _text(_section(spec, "repeat", where), f"{where}.repeat")
+        group.speakers = tuple(character(key, f"{where}.speakers") for key in _section(spec, "speakers", where))
+        if not group.speakers:
+            raise ScenarioError(f"{where}.speakers must not be empty.")
+        group.flag = flag
+        flag += 1
+        groups[number] = group
+    if not groups:
+        raise ScenarioError("A scenario needs at least one interaction group.")
+    scenario.groups = groups
+
+    examine = _section(data, "examine")
+    examination = Examination()
+    if _bind(examination, texts):
+        examination.intro = _text(_section(examine, "intro", "examine"), "examine.intro")
+        examination.lines = _lines(_section(examine, "lines", "examine"), "examine.lines")
+        examination.clues = _lines(_section(examine, "clues", "examine"), "examine.clues")
+        examination.repeat = _text(_section(examine, "repeat", "examine"), "examine.repeat")
+    examination.flag = flag
+    scenario.examination = examination
+    scenario.flag_count = flag + 1
+
+    arrest = _section(data, "arrest")
+    lineup = [character(key, "arrest.lineup") for key in _section(arrest, "lineup", "arrest")]
+    culprit_key = _section(arrest, "culprit", "arrest")
+    culprit = character(culprit_key, "arrest.culprit")
+    if culprit not in lineup:
+        raise ScenarioError("arrest.culprit must be part of arrest.lineup.")
+    scenario.lineup = tuple(character for character, _ in lineup)
+    scenario.lineup_menu = tuple(f"{number}. {character}" for number, character in enumerate(scenario.lineup, 1))
+    scenario.culprit = culprit[0]
+    scenario.culprit_number = lineup.index(culprit) + 1
+    scenario.confession = _text(_section(arrest, "confession", "arrest"), "arrest.confession")
+    scenario.denial = _text(_section(arrest, "denial", "arrest"), "arrest.denial")
+    scenario.win = _lines(_section(arrest, "win", "arrest"), "arrest.win")
+    scenario.lose = _lines(_section(arrest, "lose", "arrest"), "arrest.lose")
+
+    # Every clue the scenario can produce gets a stable id and an origin. A bundle holds the
+    # clue table it was packed with, its ids are looked up rather than handed out again.
+    if texts is None:
+        clues = []
+        clue_index = {}
+    else:
+        clues = _BundledClues(texts)
+        clue_index = _ClueIndex(clues)
+    origins = {}
+
+    def clue_ids(found, tag, source=None, carriages=()):
+        ids = []
+        for text in found:
+            clue_id = clue_index.get(text)
+            if clue_id is None:
+                if texts is not None:
+                    raise ScenarioError(f"{texts.path} is missing clue {text!r}.")
+                clue_id = clue_index[text] = len(clues)
+                clues.append(text)
+            if clue_id not in origins:
+                origins[clue_id] = ([tag], source, list(carriages))
+            ids.append(clue_id)
+        return ids
+
+    actions = [Action(("e",), examination.flag, clue_ids(examination.clues, "scene"))]
+    for group in groups.values():
+        ids = []
+        for speaker, is_evidence in group.speakers:
+            if is_evidence:
+                evidence = [speaker.introduce()]
+                statement = speaker.statement()
+                if statement is not None:
+                    evidence.append(statement)
+                ids.extend(clue_ids(evidence, "testimony", speaker._name))
+        ids.extend(clue_ids(group.clues, "interview"))
+        actions.append(Action(("i", group.number), group.flag, ids))
+    carriage_actions = [(carriage, clue_ids([carriage.clue], "evidence", carriages=[carriage.number]))
+                        for carriage in carriages]
+    if len(origins) != len(clues):
+        raise ScenarioError(f"{texts.path} holds clues the scenario never gives.")
+    scenario.clues = tuple(clues) if texts is None else clues
+    scenario.clue_index = clue_index
+
+    # A carriage's password is revealed by the clues that mention each of its words. Only the
+    # words of some password are indexed, each with its clue ids in order.
+    clues_with_word = {word: [] for carriage in carriages for word in _words(carriage.password)}
+    for clue_id, text in enumerate(clues):
+        for word in _words(text):
+            word_ids = clues_with_word.get(word)
+            if word_ids is not None and (not word_ids or word_ids[-1] != clue_id):
+                word_ids.append(clue_id)
+    for carriage, ids in carriage_actions:
+        requires = [tuple(clues_with_word[word]) for word in _words(carriage.password)]
+        for clue_id in set().union(*requires):
+            tags, _, about = origins[clue_id]
+            if "passcode" not in tags:
+                tags.append("passcode")
+            if carriage.number not in about:
+                about.append(carriage.number)
+        actions.append(Action(("c", carriage.number, carriage.password), carriage.flag, ids, requires))
+    for number, suspect in enumerate(scenario.lineup, start=1):
+        actions.append(Action(("a", number), outcome="won" if suspect is scenario.culprit else "lost"))
+    scenario.actions = tuple(actions)
+    clue_info = []
+    tag_sets = {}  # One tuple per combination of tags, shared by the clues that have it
+    for clue_id in range(len(clues)):
+        tags, source, about = origins[clue_id]
+        tags = tag_sets.setdefault(tuple(tags), tuple(tags))
+        clue_info.append(ClueInfo(clues[clue_id], tags, source, about) if texts is None
+                         else _BundledClue(texts, clue_id, tags, source, about))
+    scenario.clue_info = tuple(clue_info)
+    if texts is not None:
+        clues.info = scenario.clue_info
+    return scenario
+
+
+def load_scenario(path, character_kinds, locale=None):
+    # A scenario file, or an asset bundle packed from one. Only bundles can be localised.
+    if path.endswith(BUNDLE_SUFFIX):
+        texts = AssetBundle(path, locale)
+        skeleton = texts.get(SKELETON_ID)
+        if skeleton is None:
+            texts.close()
+            raise ScenarioError(f"{path} does not hold a scenario.")
+        return compile_scenario(json.loads(skeleton), character_kinds, texts)
+    try:
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+    except json.JSONDecodeError as e:
+        raise ScenarioError(f"{path} is not valid JSON: {e}") from e
+    return compile_scenario(data, character_kinds)
+
+
+def _remove(data, key):
+    # Delete the value at a dotted text id from scenario data
+    *path, last = key.split(".")
+    for part in path:
+        data = data[int(part)] if isinstance(data, list) else data[part]
+    data.pop(last, None)
+
+
+def translatable(key):
+    # Translations cover the narrative. Clues are found by their text, so clue texts and the
+    # character texts that testimony quotes keep their wording, and their ids, in every locale.
+    parts = key.split(".")
+    return parts[0] not in ("characters", "clues") and parts[-1] not in ("clue", "clues")
+
+
+def bundle_scenario(data, character_kinds, translations=None):
+    # The texts of an asset bundle for a scenario: the texts named in BUNDLED and the
+    # characters' texts by id, the clue table as "clues.<id>", the rest of the file as
+    # SKELETON_ID, and translations ({locale: {id: text or lines}}) under "<locale>/<id>"
+    scenario = compile_scenario(data, character_kinds)  # Validates everything first
+    skeleton = copy.deepcopy(data)
+    texts = {}
+    for owner in (scenario, scenario.examination, *scenario.carriages, *scenario.groups.values()):
+        prefix = owner._text_prefix()
+        for name, (key, _) in type(owner).BUNDLED.items():
+            texts[prefix + key] = getattr(owner, name)
+            _remove(skeleton, prefix + key)
+    for key, spec in data["characters"].items():
+        if "." in key:
+            raise ScenarioError(f"characters.{key} cannot be bundled, its key contains '.'.")
+        for field in CHARACTER_TEXTS:
+            if field in spec:
+                where = f"characters.{key}.{field}"
+                texts[where] = _text(spec[field], where)
+                _remove(skeleton, where)
+    for clue_id, text in enumerate(scenario.clues):
+        texts[f"clues.{clue_id}"] = text
+    for locale, translated in (translations or {}).items():
+        for key, value in translated.items():
+            if key not in texts:
+                raise ScenarioError(f"Translation '{locale}' has unknown text id '{key}'.")
+            if not translatable(key):
+                raise ScenarioError(f"Translation '{locale}' has text '{key}', clue and character texts "
+                                    "are not translated.")
+            where = f"{locale}/{key}"
+            texts[where] = _lines(value, where) if isinstance(texts[key], tuple) else _text(value, where)
+    texts[SKELETON_ID] = json.dumps(skeleton, separators=(",", ":"))
+    return texts
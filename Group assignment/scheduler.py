@@ -0,0 +1,87 @@
+import heapq
+import itertools
+import threading
+import time
+
+
+class Deadline:
+    def __init__(self, when, callback=None):
+        self.when = when
+        self.callback = callback
+        self.expired = threading.Event()  # Set once the deadline has passed
+        self.cancelled = False
+        self.generation = 0  # Bumped when the deadline is rescheduled, older heap entries are then stale
+
+    def remaining(self):
+        return max(0.0, self.when - time.monotonic())
+
+    def cancel(self):
+        # The heap entry is skipped lazily by the scheduler thread
+        self.cancelled = True
+
+    def _fire(self, generation):
+        if self.cancelled or generation != self.generation:
+            return
+        self.expired.set()
+        if self.callback is not None:
+            self.callback()
+
+
+class DeadlineScheduler:
+    # One heap of expiry times serviced by a single thread, shared by every session.
+    # The thread only wakes when the earliest deadline is due or a new earlier one arrives.
+    def __init__(self):
+        self.__heap = []
+        self.__counter = itertools.count()
+        self.__condition = threading.Condition()
+        self.__thread = None
+        self.wakeups = 0
+
+    def __len__(self):
+        return len(self.__heap)
+
+    def schedule(self, duration, callback=None, reuse=None):
+        # reuse takes a cancelled Deadline to arm again instead of building a new one, which
+        # saves creating its Event (see SessionPool)
+        if reuse is None:
+            deadline = Deadline(time.monotonic() + duration, callback)
+        else:
+            deadline = reuse
+            deadline.when = time.monotonic() + duration
+            deadline.callback = callback
+            deadline.expired.clear()
+            deadline.cancelled = False
+            deadline.generation += 1
+        with self.__condition:
+            heapq.heappush(self.__heap, (deadline.when, next(self.__counter), deadline, deadline.generation))
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__run, name="deadline-scheduler", daemon=True)
+                self.__thread.start()
+            elif self.__heap[0][2] is deadline:
+                self.__condition.notify()  # New earliest deadline, recompute the sleep
+        return deadline
+
+    def __pop_due(self):
+        due = []
+        now = time.monotonic()
+        heap = self.__heap
+        while heap and (heap[0][0] <= now or heap[0][2].cancelled or heap[0][3] != heap[0][2].generation):
+            _, _, deadline, generation = heapq.heappop(heap)
+            due.append((deadline, generation))
+        return due
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                due = self.__pop_due()
+                while not due:
+                    timeout = self.__heap[0][0] - time.monotonic() if self.__heap else None
+                    self.__condition.wait(timeout)
+                    self.wakeups += 1
+                    due = self.__pop_due()
+            # Callbacks run outside the lock so they can schedule new deadlines
+            for deadline, generation in due:
+                deadline._fire(generation)
+
+
+scheduler = DeadlineScheduler()  # Shared by every Game in the process
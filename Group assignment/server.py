@@ -0,0 +1,135 @@
+import argparse
+import asyncio
+
+from OopGroup2023 import Game
+from audio import null_audio
+from analytics import AnalyticsWriter
+from journal import Journal
+from metrics import Metrics, MetricsServer, prometheus_text, runtime_values
+from pool import SessionPool
+from render import Renderer
+
+FRAME_END = "\x1e"  # Sent after each prompt in framed mode so clients know the server is waiting
+
+
+class Session:
+    # One investigation driven by awaits instead of a blocking input() loop
+    def __init__(self, reader, writer, round_duration=300, framed=False, renderer=None, metrics=None, game=None):
+        self.reader = reader
+        self.writer = writer
+        self.framed = framed
+        self.renderer = Renderer() if renderer is None else renderer
+        self.game = Game(audio=False, metrics=metrics) if game is None else game
+        self.game.round_duration = round_duration
+
+    async def send(self, result):
+        text = self.renderer.frame(result.lines, result.prompt)
+        if self.framed and result.prompt is not None:
+            text += FRAME_END
+        self.writer.write(text.encode())
+        await self.writer.drain()
+
+    async def answer(self):
+        # Wait for the player's next line, but never past the round deadline
+        try:
+            line = await asyncio.wait_for(self.reader.readline(), timeout=self.game.remaining_time())
+        except asyncio.TimeoutError:
+            return None
+        if not line:
+            raise ConnectionResetError("Player disconnected.")
+        return line.decode(errors="replace").rstrip("\r\n")
+
+    async def run(self):
+        result = self.game.begin()
+        while True:
+            await self.send(result)
+            if result.finished:
+                return self.game.outcome
+            line = await self.answer()
+            if line is None:
+                result = self.game.expire()
+            else:
+                result = self.game.feed(line)
+
+
+class SessionServer:
+    def __init__(self, host="127.0.0.1", port=8023, round_duration=300, framed=False, color=True, metrics=None,
+                 pool_size=1024, journal=None, analytics=None):
+        self.host = host
+        self.port = port
+        self.round_duration = round_duration
+        self.framed = framed
+        self.renderer = Renderer(color)  # Shared, so every session reuses the same stripped lines
+        self.metrics = metrics  # Shared by every session when given
+        self.journal = journal  # Every completed turn of every session, when given
+        self.analytics = analytics  # AnalyticsWriter that gets each session once it ends
+        self.pool = SessionPool(pool_size, metrics=metrics, journal=journal)  # Finished games are reset and reused
+        self.active_sessions = 0
+        self.outcomes = {}
+
+    async def handle(self, reader, writer):
+        game = self.pool.acquire()
+        session = Session(reader, writer, self.round_duration, self.framed, self.renderer, game=game)
+        self.active_sessions += 1
+        try:
+            try:
+                outcome = await session.run()
+            except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+                # Gone, or sent a line longer than the stream limit. Releases the deadline; a game
+                # already over keeps its outcome.
+                outcome = game.abandon().outcome
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        finally:
+            self.active_sessions -= 1
+            if self.analytics is not None:
+                self.analytics.write_game(game)
+            self.pool.release(game)
+            writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass  # Already reset by the player
+
+    def metrics_text(self):
+        values = runtime_values(null_audio)
+        values.append(("game_active_sessions", "gauge", "Sessions currently connected.", self.active_sessions))
+        values.append(("game_pool_idle_sessions", "gauge", "Finished sessions waiting to be reused.", len(self.pool)))
+        values.append(("game_pool_reused_total", "counter", "Sessions served by a recycled game.", self.pool.reused))
+        for outcome, count in sorted(self.outcomes.items()):
+            values.append((f"game_outcome_{outcome}_total", "counter", f"Sessions that ended {outcome}.", count))
+        return prometheus_text(self.metrics, values)
+
+    async def serve(self):
+        server = await asyncio.start_server(self.handle, self.host, self.port, backlog=4096)
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve 'The Train Murder Mystery' over TCP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8023)
+    parser.add_argument("--round-duration", type=float, default=300)
+    parser.add_argument("--framed", action="store_true", help="end every prompt with \\x1e for scripted clients")
+    parser.add_argument("--no-color", action="store_true", help="strip ANSI colour codes from the output")
+    parser.add_argument("--pool-size", type=int, default=1024, help="finished games kept for reuse")
+    parser.add_argument("--journal", default=None, help="append every completed turn to this command journal")
+    parser.add_argument("--analytics", default=None, help="append each finished session to this NDJSON file")
+    parser.add_argument("--metrics-port", type=int, default=None, help="serve Prometheus metrics on this port")
+    args = parser.parse_args()
+
+    session_server = SessionServer(args.host, args.port, args.round_duration, args.framed, not args.no_color,
+                                   None if args.metrics_port is None else Metrics(), args.pool_size,
+                                   None if args.journal is None else Journal.open(args.journal),
+                                   None if args.analytics is None else AnalyticsWriter(open(args.analytics, "a")))
+    if args.metrics_port is not None:
+        MetricsServer(session_server.metrics_text, args.host, args.metrics_port).start()
+    try:
+        asyncio.run(session_server.serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if session_server.journal is not None:
+            session_server.journal.close()
+        if session_server.analytics is not None:
+            session_server.analytics.close()
@@ -0,0 +1,351 @@
+import bisect
+import hashlib
+import multiprocessing
+import sqlite3
+import time
+from collections import OrderedDict
+
+from OopGroup2023 import CHARACTER_KINDS, ERROR
+from pool import SessionPool
+from scenario import load_scenario
+
+# Sessions spread over worker processes. A session's whole state (clues, door and interaction
+# flags, PlayerStats, the round deadline and any half-entered command) is its Game.snapshot(),
+# kept in a shared state store after every batch of commands, so any worker can resume any
+# session. A consistent-hash ring picks the worker, so adding or removing one only moves the
+# sessions on the ring segments that change hands.
+
+ERROR_OUTCOME = "error"  # Reply outcome of a command that could not be run, the session is unchanged
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    # Each node owns `replicas` points on a 64-bit ring; a key belongs to the first point at or
+    # after its hash, wrapping round
+    __slots__ = ("replicas", "__points", "__owners", "__nodes")
+
+    def __init__(self, nodes=(), replicas=128):
+        self.replicas = replicas
+        self.__points = []
+        self.__owners = []
+        self.__nodes = set()
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self):
+        return sorted(self.__nodes)
+
+    def add(self, node):
+        if node in self.__nodes:
+            raise ValueError(f"Node {node!r} is already on the ring.")
+        self.__nodes.add(node)
+        for replica in range(self.replicas):
+            point = _hash(f"{node}#{replica}")
+            index = bisect.bisect(self.__points, point)
+            self.__points.insert(index, point)
+            self.__owners.insert(index, node)
+
+    def remove(self, node):
+        self.__nodes.remove(node)
+        keep = [(point, owner) for point, owner in zip(self.__points, self.__owners) if owner != node]
+        self.__points = [point for point, _ in keep]
+        self.__owners = [owner for _, owner in keep]
+
+    def node_for(self, key):
+        if not self.__points:
+            raise LookupError("The ring has no nodes.")
+        index = bisect.bisect_left(self.__points, _hash(str(key)))
+        return self.__owners[index if index < len(self.__owners) else 0]
+
+
+class MemoryStore:
+    # In-process stand-in for an external key-value store, for single-process use and tests
+    __slots__ = ("__data",)
+
+    def __init__(self):
+        self.__data = {}
+
+    def __len__(self):
+        return len(self.__data)
+
+    def get(self, key):
+        return self.__data.get(key)
+
+    def put_many(self, items):
+        self.__data.update(items)
+
+    def delete(self, key):
+        self.__data.pop(key, None)
+
+    def close(self):
+        pass
+
+
+class SqliteStore:
+    # Session snapshots in one SQLite file that any number of processes on the machine can share.
+    # Each put_many() is one transaction.
+    __slots__ = ("path", "__db")
+
+    def __init__(self, path, timeout=30.0):
+        self.path = path
+        self.__db = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.__db.execute("PRAGMA journal_mode=WAL")
+        self.__db.execute("PRAGMA synchronous=NORMAL")  # Durable at checkpoints, not at every commit
+        self.__db.execute("CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, state BLOB NOT NULL, "
+                          "updated REAL NOT NULL)")
+
+    def __len__(self):
+        return self.__db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def get(self, key):
+        row = self.__db.execute("SELECT state FROM sessions WHERE id = ?", (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def put_many(self, items):
+        now = time.time()
+        with self.__db:
+            self.__db.execute("BEGIN IMMEDIATE")
+            self.__db.executemany("INSERT OR REPLACE INTO sessions (id, state, updated) VALUES (?, ?, ?)",
+                                  [(key, data, now) for key, data in items.items()])
+
+    def delete(self, key):
+        self.__db.execute("DELETE FROM sessions WHERE id = ?", (key,))
+
+    def close(self):
+        self.__db.close()
+
+
+class ShardWorker:
+    # Runs the sessions the ring gives it. Live games stay cached between commands, and every
+    # batch ends by writing the touched sessions back to the store, so a session can move to
+    # another worker between any two batches.
+    __slots__ = ("name", "store", "pool", "cache_size", "__games", "loaded")
+
+    def __init__(self, name, store, scenario=None, cache_size=10000):
+        self.name = name
+        self.store = store
+        self.pool = SessionPool(capacity=256, scenario=scenario, log_level=ERROR)
+        self.cache_size = cache_size
+        self.__games = OrderedDict()  # Session id -> live Game, least recently used first
+        self.loaded = 0  # Sessions resumed from the store
+
+    def __len__(self):
+        return len(self.__games)
+
+    def __game(self, session):
+        game = self.__games.get(session)
+        if game is not None:
+            self.__games.move_to_end(session)
+            return game
+        data = self.store.get(session)
+        if data is None:
+            raise KeyError(f"Unknown session: {session}")
+        game = self.pool.acquire()
+        game.load_snapshot(data)
+        self.loaded += 1
+        self.__cache(session, game)
+        return game
+
+    def __cache(self, session, game):
+        self.__games[session] = game
+        if len(self.__games) > self.cache_size:
+            _, oldest = self.__games.popitem(last=False)  # Its state is already in the store
+            self.pool.release(oldest)
+
+    def start(self, session):
+        # Session ids are never reused, a live or finished session keeps its state
+        if session in self.__games or self.store.get(session) is not None:
+            raise ValueError(f"Session already exists: {session}")
+        game = self.pool.acquire()
+        result = game.begin()
+        self.__cache(session, game)
+        return game, result
+
+    def handle_batch(self, batch):
+        # batch holds (session, command) pairs, command None starts a new session. Returns one
+        # (session, lines, prompt, outcome) per pair; a pair that fails, e.g. for a session that
+        # is not in the store, gets an ERROR_OUTCOME reply and the rest of the batch carries on.
+        replies = []
+        dirty = {}
+        for session, command in batch:
+            try:
+                if command is None:
+                    game, result = self.start(session)
+                else:
+                    game = self.__game(session)
+                    if game.outcome is None and game.deadline is not None and game.remaining_time() <= 0:
+                        result = game.expire()  # The round ran out while the session was stored
+                    else:
+                        result = game.step(command)
+            except Exception as error:
+                replies.append(_error_reply(session, error))
+                continue
+            dirty[session] = game
+            replies.append((session, result.lines, result.prompt, result.outcome))
+        try:
+            self.store.put_many({session: game.snapshot() for session, game in dirty.items()})
+        except Exception as error:
+            # Nothing of the batch was kept: forget its games so they reload their stored state
+            for session in dirty:
+                self.drop(session)
+            return [_error_reply(session, error) for session, _ in batch]
+        for session, game in dirty.items():
+            if game.outcome is not None:
+                self.drop(session)  # Finished, only its final state in the store is still needed
+        return replies
+
+    def drop(self, session):
+        game = self.__games.pop(session, None)
+        if game is not None:
+            self.pool.release(game)
+
+    def keep_only(self, owns):
+        # Forget cached sessions the worker no longer owns after a rebalance
+        for session in [session for session in self.__games if not owns(session)]:
+            self.drop(session)
+
+
+def _error_reply(session, error):
+    message = error.args[0] if isinstance(error, KeyError) and error.args else error
+    return session, [f"Could not run the command: {message}"], None, ERROR_OUTCOME
+
+
+def _serve(name, store_path, connection, scenario_path=None):
+    # Worker process main loop: ("batch", pairs), ("ring", nodes) or ("stop",). Workers given an
+    # asset bundle all map the same file instead of each holding the scenario's texts.
+    store = SqliteStore(store_path)
+    scenario = None if scenario_path is None else load_scenario(scenario_path, CHARACTER_KINDS)
+    worker = ShardWorker(name, store, scenario)
+    ring = None
+    while True:
+        message = connection.recv()
+        if message[0] == "batch":
+            connection.send(worker.handle_batch(message[1]))
+        elif message[0] == "ring":
+            ring = HashRing(message[1], message[2])
+            worker.keep_only(lambda session: ring.node_for(session) == name)
+            connection.send(len(worker))
+        else:
+            connection.send(worker.loaded)
+            store.close()
+            return
+
+
+class ShardCluster:
+    # Worker processes on this machine behind one router. Sessions are routed by consistent
+    # hashing of their id and their state lives in a shared SQLite file. scenario_path is a
+    # scenario file or bundle every worker loads, the built-in Train Murder by default.
+    __slots__ = ("store_path", "replicas", "scenario_path", "ring", "__workers", "__next_name")
+
+    def __init__(self, store_path, workers=2, replicas=128, scenario_path=None):
+        self.store_path = store_path
+        self.replicas = replicas
+        self.scenario_path = scenario_path
+        self.ring = HashRing(replicas=replicas)
+        self.__workers = {}  # Name -> (process, connection)
+        self.__next_name = 0
+        SqliteStore(store_path).close()  # Create the table before the workers race to
+        for _ in range(workers):
+            self.add_worker()
+
+    @property
+    def workers(self):
+        return self.ring.nodes
+
+    def add_worker(self):
+        name = f"worker-{self.__next_name}"
+        self.__next_name += 1
+        self.__spawn(name)
+        self.ring.add(name)
+        self.__rebalance()
+        return name
+
+    def remove_worker(self, name):
+        self.ring.remove(name)
+        self.__stop(name)
+        self.__rebalance()
+
+    def __spawn(self, name):
+        parent, child = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=_serve, args=(name, self.store_path, child, self.scenario_path),
+                                          name=name, daemon=True)
+        process.start()
+        child.close()  # Only the worker holds its end, so the router sees EOF if the worker dies
+        self.__workers[name] = (process, parent)
+
+    def __respawn(self, name):
+        # Replace a worker that died under the same name, so the ring does not change. Its
+        # sessions reload from the store; a batch it was running when it died was not saved.
+        process, connection = self.__workers.pop(name)
+        connection.close()
+        process.join(1.0)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        self.__spawn(name)
+
+    def __stop(self, name):
+        # Returns how many sessions the worker resumed from the store, 0 if it had died
+        process, connection = self.__workers.pop(name)
+        try:
+            connection.send(("stop",))
+            loaded = connection.recv()
+        except (EOFError, OSError):
+            loaded = 0
+        connection.close()
+        process.join()
+        return loaded
+
+    def __rebalance(self):
+        # Every worker learns the new ring and drops sessions that moved away; the new owners
+        # load them from the store on their next command. A dead worker is replaced, and its
+        # replacement starts with nothing cached.
+        nodes = self.ring.nodes
+        dead = []
+        for name, (_, connection) in self.__workers.items():
+            try:
+                connection.send(("ring", nodes, self.replicas))
+            except OSError:
+                dead.append(name)
+        for name, (_, connection) in self.__workers.items():
+            if name not in dead:
+                try:
+                    connection.recv()
+                except (EOFError, OSError):
+                    dead.append(name)
+        for name in dead:
+            self.__respawn(name)
+
+    def submit(self, pairs):
+        # Route (session, command) pairs, command None to start a session. The workers run their
+        # shares in parallel; replies come back grouped by worker. The pairs of a worker that has
+        # died get ERROR_OUTCOME replies and the worker is replaced for the next submit.
+        shares = {}
+        for pair in pairs:
+            shares.setdefault(self.ring.node_for(pair[0]), []).append(pair)
+        dead = set()
+        for name, share in shares.items():
+            try:
+                self.__workers[name][1].send(("batch", share))
+            except OSError:
+                dead.add(name)
+        replies = []
+        for name, share in shares.items():
+            if name not in dead:
+                try:
+                    replies.extend(self.__workers[name][1].recv())
+                    continue
+                except (EOFError, OSError):
+                    dead.add(name)
+            error = ConnectionError(f"{name} stopped unexpectedly.")
+            replies.extend(_error_reply(session, error) for session, _ in share)
+        for name in dead:
+            self.__respawn(name)
+        return replies
+
+    def close(self):
+        return sum(self.__stop(name) for name in list(self.__workers))
@@ -0,0 +1,184 @@
+import argparse
+import time
+from collections import deque
+
+from OopGroup2023 import CHARACTER_KINDS, TRAIN_MURDER, Game
+from scenario import load_scenario
+
+
+class SolverReport:
+    __slots__ = ("scenario", "explored_states", "reachable_states", "transitions", "seconds", "exhaustive",
+                 "shortest_win", "shortest_complete_win", "unreachable_clues", "dead_ends", "losing_arrests")
+
+    def states_per_second(self):
+        return self.explored_states / self.seconds if self.seconds else 0.0
+
+    def summary(self):
+        lines = [f"Scenario: {self.scenario.id}",
+                 f"States explored: {self.explored_states} ({self.states_per_second():.0f} states/s)",
+                 f"Reachable states: {self.reachable_states}" + ("" if self.exhaustive else " (search capped)"),
+                 f"Transitions run through the game: {self.transitions}",
+                 f"Shortest win ({len(self.shortest_win)} commands): {self.shortest_win}",
+                 f"Shortest win with every reachable clue ({len(self.shortest_complete_win)} commands): "
+                 f"{self.shortest_complete_win}",
+                 f"Losing arrests: {self.losing_arrests}",
+                 f"Unreachable clues: {len(self.unreachable_clues)}"]
+        lines.extend(f"  - {clue}" for clue in self.unreachable_clues)
+        lines.append(f"Dead ends (stuck with clues still locked away): {len(self.dead_ends)}")
+        return "\n".join(lines)
+
+
+class Solver:
+    # Breadth-first search over every state the game can reach. Each transition is run by a
+    # headless Game restored from a snapshot, states are keyed by (flags, clue bitmask).
+    def __init__(self, scenario=None, fair=True, max_states=1000000, agent_name="Agent"):
+        self.scenario = TRAIN_MURDER if scenario is None else scenario
+        self.fair = fair  # Only try passwords the clues found so far have revealed
+        self.max_states = max_states
+        self.agent_name = agent_name
+
+        clue_bit = {clue: 1 << index for index, clue in enumerate(self.scenario.clues)}
+        self.__clue_bit = clue_bit
+        required = 0
+        for action in self.scenario.actions:
+            for clue_ids in action.requires:
+                for clue_id in clue_ids:
+                    required |= 1 << clue_id
+
+        # Actions that need no password and reveal nothing a password needs commute with
+        # everything else, so they are left out of the search and counted analytically
+        self.core = []
+        self.independent = []
+        self.arrests = []
+        for action in self.scenario.actions:
+            if action.outcome is not None:
+                self.arrests.append(action)
+                continue
+            masks = tuple(_mask(clue_ids) for clue_ids in action.requires)
+            if not masks and not _mask(action.clues) & required:
+                self.independent.append(action)
+            else:
+                self.core.append((action, masks))
+
+    def __key(self, game):
+        mask = 0
+        for clue in game.clues:
+            mask |= self.__clue_bit.get(clue, 0)
+        return game.flags, mask
+
+    def __enabled(self, masks, clue_mask):
+        if not self.fair:
+            return True
+        for mask in masks:
+            if not clue_mask & mask:
+                return False
+        return True
+
+    def solve(self):
+        start_time = time.perf_counter()
+        start = Game(audio=False, scenario=self.scenario)
+        start.step(("s", self.agent_name))
+        start_key = self.__key(start)
+
+        snapshots = {start_key: start.snapshot()}
+        parents = {start_key: None}
+        queue = deque([start_key])
+        transitions = 0
+        dead_ends = []
+        exhaustive = True
+
+        while queue:
+            key = queue.popleft()
+            flags, clue_mask = key
+            progressed = False
+            snapshot = snapshots.pop(key)  # Expanded states are never restored again
+            for action, masks in self.core:
+                if flags & action.bit or not self.__enabled(masks, clue_mask):
+                    continue
+                game = Game.restore(snapshot, scenario=self.scenario)
+                game.step(action.command)
+                transitions += 1
+                new_key = self.__key(game)
+                if new_key == key:
+                    continue  # Wrong password or nothing new, the game is back at the menu
+                progressed = True
+                if new_key in parents:
+                    continue  # Already visited through another order of the same actions
+                if len(parents) >= self.max_states:
+                    exhaustive = False
+                    continue
+                parents[new_key] = (key, action.command)
+                snapshots[new_key] = game.snapshot()
+                queue.append(new_key)
+            if not progressed:
+                dead_ends.append(key)
+
+        report = SolverReport()
+        report.scenario = self.scenario
+        report.explored_states = len(parents)
+        report.reachable_states = len(parents) << len(self.independent)
+        report.transitions = transitions
+        report.exhaustive = exhaustive
+
+        independent_mask = 0
+        for action in self.independent:
+            independent_mask |= _mask(action.clues)
+        reached_mask = independent_mask
+        best = start_key
+        for key in parents:
+            reached_mask |= key[1]
+            if _popcount(key[1]) > _popcount(best[1]):
+                best = key
+        all_clues = (1 << len(self.scenario.clues)) - 1
+        report.unreachable_clues = [clue for index, clue in enumerate(self.scenario.clues)
+                                    if not reached_mask >> index & 1]
+        report.dead_ends = [key for key in dead_ends if (key[1] | independent_mask) != all_clues]
+
+        arrest = next(action.command for action in self.arrests if action.outcome == "won")
+        opening = [("s", self.agent_name)]
+        report.shortest_win = opening + [arrest]
+        report.shortest_complete_win = (opening + self.__path(parents, best)
+                                        + [action.command for action in self.independent] + [arrest])
+        report.losing_arrests = [action.command for action in self.arrests if action.outcome == "lost"]
+        report.seconds = time.perf_counter() - start_time
+
+        self.__verify(report.shortest_complete_win)
+        return report
+
+    def __path(self, parents, key):
+        path = []
+        while parents[key] is not None:
+            key, command = parents[key]
+            path.append(command)
+        path.reverse()
+        return path
+
+    def __verify(self, commands):
+        # Replay the reported route through a fresh game to make sure it really wins
+        game = Game(audio=False, scenario=self.scenario)
+        for command in commands:
+            game.step(command)
+        if game.outcome != "won":
+            raise RuntimeError(f"Solver route did not win the game: {commands}")
+
+
+def _mask(clue_ids):
+    mask = 0
+    for clue_id in clue_ids:
+        mask |= 1 << clue_id
+    return mask
+
+
+def _popcount(value):
+    return bin(value).count("1")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Explore every reachable state of a scenario.")
+    parser.add_argument("scenario", nargs="?", help="scenario JSON file, defaults to the Train Murder")
+    parser.add_argument("--guess", action="store_true", help="allow passwords the player has not been told")
+    parser.add_argument("--max-states", type=int, default=1000000)
+    args = parser.parse_args()
+
+    scenario = load_scenario(args.scenario, CHARACTER_KINDS) if args.scenario else None
+    print(Solver(scenario, fair=not args.guess, max_states=args.max_states).solve().summary())